@@ -0,0 +1,128 @@
+"""
+Answer many degrees-of-separation queries in one process.
+
+Reads one "source<TAB>target" pair per line, where each side is a name
+or an IMDb person id, and writes one JSON object per line:
+
+    {"source": ..., "target": ..., "degrees": 2, "path": [...]}
+
+Queries that share a source reuse one breadth-first search tree.
+
+Usage: python batch.py [directory] [--input FILE] [--max-trees N]
+"""
+
+import argparse
+import json
+import sys
+from collections import OrderedDict
+
+import degrees
+
+
+class QueryError(Exception):
+    pass
+
+
+def resolve(name):
+    """
+    Returns the person id for a name or id, without prompting.
+    """
+    name = name.strip()
+    if name in degrees.people:
+        return name
+    person_ids = degrees.names.get(name.lower(), set())
+    if len(person_ids) == 0:
+        raise QueryError(f"person not found: {name}")
+    if len(person_ids) > 1:
+        raise QueryError(
+            f"ambiguous name {name}: {', '.join(sorted(person_ids))}"
+        )
+    return next(iter(person_ids))
+
+
+class BatchSearch():
+    """
+    Answers queries, keeping the search trees of the most recently
+    used sources.
+    """
+
+    def __init__(self, max_trees=64):
+        self.max_trees = max_trees
+        self.trees = OrderedDict()
+
+    def tree(self, source):
+        """
+        Returns the search tree for a source person id.
+        """
+        if source in self.trees:
+            self.trees.move_to_end(source)
+        else:
+            self.trees[source] = degrees.SearchTree(source)
+            if len(self.trees) > self.max_trees:
+                self.trees.popitem(last=False)
+        return self.trees[source]
+
+    def answer(self, source_name, target_name):
+        """
+        Returns the JSON-ready result for one query.
+        """
+        record = {"source": source_name, "target": target_name}
+        try:
+            source = resolve(source_name)
+            target = resolve(target_name)
+        except QueryError as e:
+            record["error"] = str(e)
+            return record
+
+        path = self.tree(source).path_to(target)
+        if path is None:
+            record["degrees"] = None
+            record["path"] = None
+        else:
+            record["degrees"] = len(path)
+            record["path"] = [
+                {
+                    "movie_id": movie_id,
+                    "movie": degrees.movies[movie_id]["title"],
+                    "person_id": person_id,
+                    "person": degrees.people[person_id]["name"],
+                }
+                for movie_id, person_id in path
+            ]
+        return record
+
+
+def read_pairs(lines):
+    """
+    Yields (source, target) pairs from tab-separated lines,
+    skipping blank lines.
+    """
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        source, _, target = line.partition("\t")
+        yield source.strip(), target.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer degrees-of-separation queries in bulk."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--input", type=argparse.FileType("r", encoding="utf-8"),
+                        default=sys.stdin,
+                        help="tab-separated source/target pairs (default: stdin)")
+    parser.add_argument("--max-trees", type=int, default=64,
+                        help="number of source search trees to keep")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory)
+
+    search = BatchSearch(max_trees=args.max_trees)
+    for source, target in read_pairs(args.input):
+        print(json.dumps(search.answer(source, target)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare the list-backed and deque-backed frontiers on a breadth-first
+search over a synthetic graph.
+
+Usage: python bench_frontier.py [--nodes N] [--legacy-nodes N]
+"""
+
+import argparse
+import time
+
+from util import Node, QueueFrontier, ListQueueFrontier
+
+
+def neighbors(state, nodes, degree):
+    """
+    Returns the neighbors of a state in a synthetic graph where every
+    node links to `degree` pseudo-random nodes.
+    """
+    return [(state * 2654435761 + k * 40503 + 1) % nodes for k in range(degree)]
+
+
+def bfs(frontier_class, nodes, degree):
+    """
+    Explores the whole graph reachable from node 0 the same way
+    degrees.shortest_path does, returning the number of nodes visited.
+    """
+    frontier = frontier_class()
+    frontier.add(Node(state=0, parent=None, action=None))
+    explored = set()
+    while not frontier.empty():
+        node = frontier.remove()
+        explored.add(node.state)
+        for state in neighbors(node.state, nodes, degree):
+            if not frontier.contains_state(state) and state not in explored:
+                frontier.add(Node(state=state, parent=node, action=None))
+    return len(explored)
+
+
+def run(frontier_class, nodes, degree):
+    start = time.perf_counter()
+    visited = bfs(frontier_class, nodes, degree)
+    elapsed = time.perf_counter() - start
+    print(f"{frontier_class.__name__:>18} {nodes:>10} nodes "
+          f"{visited:>10} visited {elapsed:>9.3f}s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--legacy-nodes", type=int, default=20_000,
+                        help="graph size for the list-backed frontier, "
+                             "which is quadratic and too slow for --nodes")
+    parser.add_argument("--degree", type=int, default=3)
+    args = parser.parse_args()
+
+    legacy = run(ListQueueFrontier, args.legacy_nodes, args.degree)
+    current = run(QueueFrontier, args.legacy_nodes, args.degree)
+    print(f"speedup at {args.legacy_nodes} nodes: {legacy / current:.1f}x")
+    run(QueueFrontier, args.nodes, args.degree)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import csv
 import sys
 
+import ingest
+from graph import AdjacencyCache, CompactGraph
+from landmarks import LandmarkIndex
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,11 +15,138 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Integer-indexed store of the same data, set when loaded with compact=True
+# or from a snapshot
+graph = None
 
-def load_data(directory):
+# Landmark distance index over graph, set by load_landmarks
+landmarks = None
+
+# Cache of neighbors_for_person results for the dicts, see load_data
+adjacency = None
+
+# Snapshot and landmark index file names inside a data directory
+SNAPSHOT = "degrees.snapshot"
+LANDMARKS = "degrees.landmarks"
+
+
+def data_sources(directory):
+    """
+    Returns the paths of the CSV files in a data directory.
+    """
+    return [f"{directory}/{name}.csv" for name in ("people", "movies", "stars")]
+
+
+def landmarks_path(directory):
+    """
+    Returns the path of the landmark index for a data directory.
+    """
+    return f"{directory}/{LANDMARKS}"
+
+
+def load_data(directory, compact=False, snapshot=True, adjacency_size=0,
+              processes=1):
     """
     Load data from CSV files into memory.
+
+    With compact=True the data is kept in a CompactGraph and
+    names/people/movies become read-only views over it.
+
+    With snapshot=True a binary snapshot of the parsed data is written
+    next to the CSV files, and later calls memory-map it (as a compact
+    graph) instead of parsing the CSV files again, for as long as the
+    CSV files keep the same size and mtime.
+
+    adjacency_size caches each person's (co-star, movie) neighbors as
+    prebuilt tuples: 0 disables the cache, None precomputes it for
+    everyone now, and a positive number keeps that many recently
+    expanded people.
+
+    With processes other than 1 the CSV files are parsed in chunks by
+    that many worker processes (None for one per CPU) straight into a
+    compact graph.
+    """
+    global graph, names, people, movies, landmarks, adjacency
+    landmarks = None
+    adjacency = None
+    path = f"{directory}/{SNAPSHOT}"
+    sources = data_sources(directory)
+    if snapshot:
+        cached = CompactGraph.open(path, sources)
+        if cached is not None:
+            graph = cached
+            names, people, movies = graph.names, graph.people, graph.movies
+            cache_adjacency(adjacency_size)
+            return
+
+    if processes != 1:
+        graph, _ = ingest.load(directory, processes)
+        names, people, movies = graph.names, graph.people, graph.movies
+    elif compact:
+        graph = CompactGraph.from_csv(directory)
+        names, people, movies = graph.names, graph.people, graph.movies
+    else:
+        load_csv(directory)
+
+    if snapshot:
+        try:
+            snapshot_graph = graph if graph is not None else \
+                CompactGraph.from_dicts(people, movies)
+            snapshot_graph.save(path, sources)
+        except OSError:
+            pass
+    cache_adjacency(adjacency_size)
+
+
+def cache_adjacency(maxsize):
+    """
+    Sets up the neighbors cache described in load_data for the
+    loaded data.
+    """
+    global adjacency
+    adjacency = None
+    if graph is not None:
+        graph.cache_adjacency(maxsize)
+    elif maxsize != 0:
+        adjacency = AdjacencyCache(scan_neighbors, maxsize)
+        if maxsize is None:
+            adjacency.precompute(people)
+
+
+def adjacency_stats():
+    """
+    Returns the hit, miss and memory counters of the neighbors cache,
+    or None when it is off.
+    """
+    cache = graph.adjacency if graph is not None else adjacency
+    return cache.stats() if cache is not None else None
+
+
+def load_landmarks(directory):
+    """
+    Loads the landmark index built by `python landmarks.py build`,
+    which shortest_path then uses to guide its search. Needs data
+    loaded as a compact graph or from a snapshot.
+
+    Returns whether an up-to-date index was found.
+    """
+    global landmarks
+    landmarks = None
+    if graph is not None:
+        landmarks = LandmarkIndex.open(landmarks_path(directory), graph,
+                                       data_sources(directory))
+    return landmarks is not None
+
+
+def load_csv(directory):
+    """
+    Load data from CSV files into the names, people and movies dicts.
     """
+    global graph, names, people, movies
+    if graph is not None:
+        graph = None
+        names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -53,13 +183,18 @@ def load_data(directory):
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--compact] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=compact)
+    load_landmarks(directory)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +204,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = bidirectional_shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -91,6 +226,11 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    if landmarks is not None:
+        return landmarks.shortest_path(source, target)
+    if graph is not None:
+        return graph.shortest_path(source, target)
+
     if source == target:
         return tuple()
 
@@ -140,6 +280,154 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from both
+    ends at once and meeting in the middle.
+
+    If no possible path, returns None.
+    """
+    if landmarks is not None:
+        return landmarks.shortest_path(source, target)
+    if graph is not None:
+        return graph.shortest_path(source, target)
+
+    if source == target:
+        return tuple()
+
+    # Maps person_id to the (movie_id, person_id) step that reached it,
+    # walking towards the source (forward) or the target (backward)
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Expand one whole layer of the smaller frontier
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, visited, other = forward_frontier, forward, backward
+        else:
+            frontier, visited, other = backward_frontier, backward, forward
+
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in visited:
+                    continue
+                visited[neighbor] = (movie_id, person_id)
+
+                # Both searches have reached this person, so join the halves
+                if neighbor in other:
+                    return join_paths(forward, backward, neighbor)
+
+                next_frontier.append(neighbor)
+
+        if visited is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+class SearchTree():
+    """
+    Breadth-first search tree rooted at a source person. Layers are
+    explored lazily and kept, so later targets from the same source
+    reuse the search done for earlier ones.
+
+    When a compact graph is loaded the tree is kept over its person
+    indices, and ids are only translated at the ends.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.graph = graph
+        if graph is not None:
+            source = graph.person_index(source)
+            self.neighbors = graph.neighbors
+        else:
+            self.neighbors = neighbors_for_person
+        # Maps person to the (movie, person) step that reached it
+        self.parents = {source: None}
+        # Layer being expanded, position in it, and the layer it builds
+        self.frontier = [source] if source is not None else []
+        self.cursor = 0
+        self.next_frontier = []
+
+    def expand(self, target):
+        """
+        Explores the tree in breadth-first order until the target has
+        been reached or every reachable person has been explored.
+        """
+        parents = self.parents
+        while target not in parents:
+            if self.cursor == len(self.frontier):
+                if not self.next_frontier:
+                    return
+                self.frontier, self.next_frontier = self.next_frontier, []
+                self.cursor = 0
+            person = self.frontier[self.cursor]
+            self.cursor += 1
+            for movie, neighbor in self.neighbors(person):
+                if neighbor not in parents:
+                    parents[neighbor] = (movie, person)
+                    self.next_frontier.append(neighbor)
+
+    def path_to(self, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        if target == self.source:
+            return []
+        if self.graph is not None:
+            target = self.graph.person_index(target)
+            if target is None:
+                return None
+
+        self.expand(target)
+        if target not in self.parents:
+            return None
+
+        solution = []
+        person = target
+        while self.parents[person] is not None:
+            movie, parent = self.parents[person]
+            solution.append((movie, person))
+            person = parent
+        solution.reverse()
+        if self.graph is not None:
+            solution = [(self.graph.movie_ids[movie], self.graph.person_ids[person])
+                        for movie, person in solution]
+        return solution
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Returns the (movie_id, person_id) path through the person where
+    the forward and backward searches met.
+    """
+    solution = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        solution.append((movie_id, person_id))
+        person_id = parent
+    solution.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child = backward[person_id]
+        solution.append((movie_id, child))
+        person_id = child
+    return solution
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -171,6 +459,18 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+    if adjacency is not None:
+        return adjacency.get(person_id)
+    return scan_neighbors(person_id)
+
+
+def scan_neighbors(person_id):
+    """
+    Returns neighbors_for_person's pairs by walking the star set
+    of every movie of a person.
+    """
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,189 @@
+"""
+Separation distributions over the degrees co-star graph.
+
+A single-source pass gives everyone's distance from one person (their
+"Bacon number" when the source is Kevin Bacon) and the count of people
+at each hop. A sampled multi-source pass runs single-source passes from
+random people (or from everyone, for exact counts) in a process pool
+and estimates the histogram of distances over all pairs of people.
+
+Results are written as CSV, or as Parquet when pyarrow is installed
+and the output file name ends in .parquet.
+
+Usage: python distances.py source [directory] NAME [--output FILE]
+       python distances.py sample [directory] [-n N] [--processes N]
+                                  [--output FILE]
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import sys
+
+import degrees
+from graph import UNREACHABLE
+
+# Graph used by pool workers, inherited on fork or loaded on spawn
+worker_graph = None
+
+
+def histogram(distance):
+    """
+    Returns {hops: people} for a distance array, leaving out the
+    people it cannot reach.
+    """
+    counts = {}
+    for hops in range(UNREACHABLE):
+        count = distance.count(hops)
+        if count:
+            counts[hops] = count
+    return counts
+
+
+def single_source(graph, person_id):
+    """
+    Returns (distance, histogram) for one person id, where distance
+    holds hop counts for every person index of the graph.
+    """
+    source = graph.person_index(person_id)
+    if source is None:
+        raise KeyError(person_id)
+    distance = graph.distances(source)
+    return distance, histogram(distance)
+
+
+def init_worker(directory):
+    global worker_graph
+    if directory is not None:
+        degrees.load_data(directory)
+    worker_graph = degrees.graph
+
+
+def sample_worker(source):
+    return histogram(worker_graph.distances(source))
+
+
+def sampled_histogram(graph, directory, samples, processes=None, seed=0):
+    """
+    Estimates {hops: ordered pairs of people} over the whole graph from
+    single-source passes out of `samples` random people, run in a
+    process pool. Also returns the estimated unreachable pairs. With
+    at least as many samples as people the counts are exact.
+    """
+    people = len(graph.person_ids)
+    if samples >= people:
+        # Every person as a source: the exact all-pairs histogram
+        samples = people
+        sources = range(people)
+    else:
+        rng = random.Random(seed)
+        sources = [rng.randrange(people) for _ in range(samples)]
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    inherit = context.get_start_method() == "fork"
+
+    global worker_graph
+    worker_graph = graph
+    totals = {}
+    with context.Pool(processes, initializer=init_worker,
+                      initargs=(None if inherit else directory,)) as pool:
+        for counts in pool.imap_unordered(sample_worker, sources):
+            for hops, count in counts.items():
+                totals[hops] = totals.get(hops, 0) + count
+
+    # Each sample sees every person once, so scale its counts by people / samples
+    scale = people / samples
+    estimate = {hops: count * scale for hops, count in sorted(totals.items())}
+    unreachable = people * people - sum(estimate.values())
+    return estimate, unreachable
+
+
+def histogram_rows(estimate, unreachable, people):
+    """
+    Returns (distance, pairs, fraction) rows for a sampled histogram.
+    The unreachable pairs come last with a distance of None (empty in
+    CSV, null in Parquet), keeping the distance column all integers.
+    """
+    total = people * people
+    rows = [(hops, round(pairs), pairs / total)
+            for hops, pairs in estimate.items()]
+    rows.append((None, round(unreachable), unreachable / total))
+    return rows
+
+
+def write_table(path, columns, rows):
+    """
+    Writes rows to CSV, or Parquet when the path ends in .parquet.
+    """
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            sys.exit("Writing Parquet needs pyarrow: pip install pyarrow")
+        rows = list(rows)
+        table = pyarrow.table({
+            column: [row[i] for row in rows] for i, column in enumerate(columns)
+        })
+        pyarrow.parquet.write_table(table, path)
+        return
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Separation distributions over the co-star graph."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    source = commands.add_parser("source", help="distances from one person")
+    source.add_argument("directory", nargs="?", default="large")
+    source.add_argument("name", help="name or person id of the source")
+    source.add_argument("--output", help="per-person distances file")
+    sample = commands.add_parser("sample", help="estimate all-pairs histogram")
+    sample.add_argument("directory", nargs="?", default="large")
+    sample.add_argument("-n", type=int, default=100, help="number of sources")
+    sample.add_argument("--processes", type=int, default=os.cpu_count())
+    sample.add_argument("--seed", type=int, default=0)
+    sample.add_argument("--output", help="histogram file")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=True)
+    graph = degrees.graph
+
+    if args.command == "source":
+        person_id = args.name
+        if graph.person_index(person_id) is None:
+            person_id = degrees.person_id_for_name(args.name)
+            if person_id is None:
+                sys.exit("Person not found.")
+        distance, counts = single_source(graph, person_id)
+        for hops, count in counts.items():
+            print(f"{hops}\t{count}")
+        print(f"unreachable\t{distance.count(UNREACHABLE)}")
+        if args.output:
+            write_table(args.output, ("person_id", "name", "distance"), (
+                (graph.person_ids[person], graph.person_names[person], hops)
+                for person, hops in enumerate(distance)
+                if hops != UNREACHABLE
+            ))
+    else:
+        estimate, unreachable = sampled_histogram(
+            graph, args.directory, args.n, args.processes, args.seed
+        )
+        rows = histogram_rows(estimate, unreachable, len(graph.person_ids))
+        for hops, pairs, fraction in rows:
+            label = "unreachable" if hops is None else hops
+            print(f"{label}\t{pairs}\t{fraction:.4f}")
+        if args.output:
+            write_table(args.output, ("distance", "pairs", "fraction"), rows)
+
+
+if __name__ == "__main__":
+    main()
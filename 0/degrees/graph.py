@@ -0,0 +1,670 @@
+"""
+Compact, integer-indexed storage for the degrees dataset.
+
+People and movies are interned into dense integers (their rank in sorted
+id order) and the star relation is stored twice as CSR (compressed
+sparse row) arrays: person -> movies and movie -> stars. Strings live in
+packed UTF-8 buffers instead of one Python object per field.
+"""
+
+import bisect
+import csv
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+
+# Snapshot layout: magic, 8-byte header length, JSON header, then every
+# buffer below at an 8-byte aligned offset
+SNAPSHOT_MAGIC = b"DEGSNAP1"
+STRING_TABLES = ("person_ids", "person_names", "person_births",
+                 "movie_ids", "movie_titles", "movie_years", "name_keys")
+ARRAYS = ("person_offsets", "person_movies",
+          "movie_offsets", "movie_stars", "name_people")
+
+# Distance value for people a search cannot reach
+UNREACHABLE = 255
+
+
+class StringTable():
+    """
+    Immutable sequence of strings packed into one UTF-8 buffer,
+    where string i spans data[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array("q", [0])
+        chunks = []
+        position = 0
+        for string in strings:
+            chunk = string.encode("utf-8")
+            chunks.append(chunk)
+            position += len(chunk)
+            offsets.append(position)
+        return cls(b"".join(chunks), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def index(self, string):
+        """
+        Returns the position of a string in a sorted table, or None.
+        """
+        i = bisect.bisect_left(self, string)
+        if i < len(self) and self[i] == string:
+            return i
+        return None
+
+
+def source_stats(paths):
+    """
+    Returns [path, size, mtime_ns] for each path, used to detect
+    when a snapshot no longer matches the files it was built from.
+    """
+    stats = []
+    for path in paths:
+        stat = os.stat(path)
+        stats.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return stats
+
+
+def csr(pairs, rows):
+    """
+    Returns (offsets, columns) arrays for a sorted, de-duplicated
+    sequence of (row, column) pairs over `rows` rows.
+    """
+    offsets = array("q", bytes(8 * (rows + 1)))
+    columns = array("i")
+    for row, column in pairs:
+        offsets[row + 1] += 1
+        columns.append(column)
+    for row in range(rows):
+        offsets[row + 1] += offsets[row]
+    return offsets, columns
+
+
+class AdjacencyCache():
+    """
+    Cache of neighbor tuples computed by a neighbors function, either
+    precomputed for every key or bounded to the maxsize most recently
+    used keys.
+    """
+
+    def __init__(self, compute, maxsize=None):
+        self.compute = compute
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.pairs = 0
+        self.nbytes = 0
+
+    def precompute(self, keys):
+        """
+        Builds the tuples for every key up front.
+        """
+        for key in keys:
+            self.get(key)
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the neighbor tuple of a key.
+        """
+        try:
+            neighbors = self.entries[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            if self.maxsize is not None:
+                self.entries.move_to_end(key)
+            return neighbors
+
+        self.misses += 1
+        neighbors = tuple(self.compute(key))
+        self.entries[key] = neighbors
+        self.pairs += len(neighbors)
+        self.nbytes += self.size(neighbors)
+        if self.maxsize is not None and len(self.entries) > self.maxsize:
+            _, evicted = self.entries.popitem(last=False)
+            self.pairs -= len(evicted)
+            self.nbytes -= self.size(evicted)
+        return neighbors
+
+    @staticmethod
+    def size(neighbors):
+        """
+        Returns the approximate bytes held by one neighbor tuple.
+        """
+        if not neighbors:
+            return sys.getsizeof(neighbors)
+        return sys.getsizeof(neighbors) + len(neighbors) * sys.getsizeof(neighbors[0])
+
+    def stats(self):
+        """
+        Returns hit, miss and memory counters.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "maxsize": self.maxsize,
+            "pairs": self.pairs,
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CompactGraph():
+    """
+    Co-star graph of people and movies indexed by dense integers.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 name_keys, name_people):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.name_keys = name_keys
+        self.name_people = name_people
+
+        # Dict-like views matching degrees' names/people/movies
+        self.names = NamesView(self)
+        self.people = PeopleView(self)
+        self.movies = MoviesView(self)
+
+        # Optional cache of co-star adjacency, see cache_adjacency
+        self.adjacency = None
+
+    @classmethod
+    def build(cls, people_rows, movie_rows, star_rows):
+        """
+        Builds a graph from iterables of (id, name, birth) people rows,
+        (id, title, year) movie rows and (person_id, movie_id) star rows.
+        Stars that refer to unknown people or movies are skipped.
+        """
+        people = {row[0]: row for row in people_rows}
+        movies = {row[0]: row for row in movie_rows}
+        person_order = sorted(people)
+        movie_order = sorted(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_order)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_order)}
+
+        # Encode every star as one integer so sorting de-duplicates cheaply
+        n_people, n_movies = len(person_order), len(movie_order)
+        stars = set()
+        for person_id, movie_id in star_rows:
+            try:
+                stars.add(person_index[person_id] * n_movies + movie_index[movie_id])
+            except KeyError:
+                pass
+        stars = sorted(stars)
+        person_offsets, person_movies = csr(
+            (divmod(star, n_movies) for star in stars), n_people
+        )
+        stars = sorted((star % n_movies) * n_people + star // n_movies
+                       for star in stars)
+        movie_offsets, movie_stars = csr(
+            (divmod(star, n_people) for star in stars), n_movies
+        )
+        del stars
+
+        name_order = sorted(
+            (people[person_id][1].lower(), i)
+            for i, person_id in enumerate(person_order)
+        )
+
+        return cls(
+            person_ids=StringTable.from_strings(person_order),
+            person_names=StringTable.from_strings(
+                people[person_id][1] for person_id in person_order),
+            person_births=StringTable.from_strings(
+                people[person_id][2] for person_id in person_order),
+            movie_ids=StringTable.from_strings(movie_order),
+            movie_titles=StringTable.from_strings(
+                movies[movie_id][1] for movie_id in movie_order),
+            movie_years=StringTable.from_strings(
+                movies[movie_id][2] for movie_id in movie_order),
+            person_offsets=person_offsets,
+            person_movies=person_movies,
+            movie_offsets=movie_offsets,
+            movie_stars=movie_stars,
+            name_keys=StringTable.from_strings(key for key, _ in name_order),
+            name_people=array("i", (i for _, i in name_order)),
+        )
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds a graph straight from a degrees data directory.
+        """
+        with open(f"{directory}/people.csv", encoding="utf-8") as people_file, \
+                open(f"{directory}/movies.csv", encoding="utf-8") as movies_file, \
+                open(f"{directory}/stars.csv", encoding="utf-8") as stars_file:
+            return cls.build(
+                ((row["id"], row["name"], row["birth"])
+                 for row in csv.DictReader(people_file)),
+                ((row["id"], row["title"], row["year"])
+                 for row in csv.DictReader(movies_file)),
+                ((row["person_id"], row["movie_id"])
+                 for row in csv.DictReader(stars_file)),
+            )
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Builds a graph from degrees' people and movies dictionaries.
+        """
+        return cls.build(
+            ((person_id, person["name"], person["birth"])
+             for person_id, person in people.items()),
+            ((movie_id, movie["title"], movie["year"])
+             for movie_id, movie in movies.items()),
+            ((person_id, movie_id)
+             for person_id, person in people.items()
+             for movie_id in person["movies"]),
+        )
+
+    def save(self, path, sources=()):
+        """
+        Writes the graph to a snapshot file that CompactGraph.open can
+        memory-map. The size and mtime of each source file are recorded
+        so a snapshot is ignored once its sources change.
+        """
+        buffers = []
+        for name in STRING_TABLES:
+            table = getattr(self, name)
+            buffers.append((f"{name}.data", "B", table.data))
+            buffers.append((f"{name}.offsets", "q", table.offsets))
+        for name in ARRAYS:
+            values = getattr(self, name)
+            buffers.append((name, getattr(values, "typecode", None)
+                            or values.format, values))
+
+        layout = []
+        offset = 0
+        for name, typecode, values in buffers:
+            size = memoryview(values).nbytes
+            layout.append([name, typecode, offset, size])
+            offset += -(-size // 8) * 8
+        header = json.dumps(
+            {"sources": source_stats(sources), "buffers": layout}
+        ).encode("utf-8")
+        start = -(-(len(SNAPSHOT_MAGIC) + 8 + len(header)) // 8) * 8
+
+        # Write next to the target and rename, so readers never see half a file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(SNAPSHOT_MAGIC)
+                f.write(len(header).to_bytes(8, "little"))
+                f.write(header)
+                for (_, _, offset, _), (_, _, values) in zip(layout, buffers):
+                    f.write(bytes(start + offset - f.tell()))
+                    f.write(memoryview(values).cast("B"))
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @classmethod
+    def open(cls, path, sources=()):
+        """
+        Memory-maps a snapshot written by save, returning None if it is
+        missing, unreadable or older than its source files.
+        """
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        view = memoryview(mapped)
+        try:
+            if view[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                return None
+            position = len(SNAPSHOT_MAGIC)
+            length = int.from_bytes(view[position:position + 8], "little")
+            position += 8
+            header = json.loads(str(view[position:position + length], "utf-8"))
+            if header["sources"] != source_stats(sources):
+                return None
+            start = -(-(position + length) // 8) * 8
+            buffers = {
+                name: view[start + offset:start + offset + size].cast(typecode)
+                for name, typecode, offset, size in header["buffers"]
+            }
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        fields = {
+            name: StringTable(buffers[f"{name}.data"], buffers[f"{name}.offsets"])
+            for name in STRING_TABLES
+        }
+        fields.update((name, buffers[name]) for name in ARRAYS)
+        graph = cls(**fields)
+
+        # Keep the mapping alive for as long as the graph uses its buffers
+        graph.mapped = mapped
+        return graph
+
+    def person_index(self, person_id):
+        """
+        Returns the dense index of an IMDb person id, or None.
+        """
+        return self.person_ids.index(person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the dense index of an IMDb movie id, or None.
+        """
+        return self.movie_ids.index(movie_id)
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person index starred in.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices who starred in a movie index.
+        """
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for people who starred with
+        a given person index, including the person themselves.
+        """
+        if self.adjacency is not None:
+            return self.adjacency.get(person)
+        return self.costars(person)
+
+    def costars(self, person):
+        """
+        Yields the (movie, person) index pairs of neighbors by walking
+        the star list of every movie of a person index.
+        """
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for movie in self.movies_of(person):
+            for star in movie_stars[movie_offsets[movie]:movie_offsets[movie + 1]]:
+                yield movie, star
+
+    def cache_adjacency(self, maxsize=None):
+        """
+        Serves neighbors from prebuilt tuples: for every person at once
+        when maxsize is None, otherwise for up to maxsize recently used
+        people. maxsize=0 turns the cache off.
+
+        The cache serves neighbors and search; distances, which visits
+        everyone reachable, always walks the CSR arrays.
+        """
+        if maxsize == 0:
+            self.adjacency = None
+        elif maxsize is None:
+            self.adjacency = AdjacencyCache(self.costars)
+            self.adjacency.precompute(range(len(self.person_ids)))
+        else:
+            self.adjacency = AdjacencyCache(self.costars, maxsize)
+        return self.adjacency
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        person = self.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            (self.movie_ids[movie], self.person_ids[star])
+            for movie, star in self.neighbors(person)
+        }
+
+    def distances(self, source):
+        """
+        Returns a bytearray of co-star hop distances from a person index
+        to every person, with UNREACHABLE for people it cannot reach.
+        Distances past UNREACHABLE - 1 are clamped to it.
+        """
+        distance = bytearray([UNREACHABLE]) * len(self.person_ids)
+        distance[source] = 0
+
+        # A movie's stars are all reached the first time it is scanned,
+        # so every movie only needs scanning once
+        scanned = bytearray(len(self.movie_ids))
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth = min(depth + 1, UNREACHABLE - 1)
+            next_frontier = []
+            for person in frontier:
+                for movie in self.movies_of(person):
+                    if scanned[movie]:
+                        continue
+                    scanned[movie] = 1
+                    for star in movie_stars[movie_offsets[movie]:movie_offsets[movie + 1]]:
+                        if distance[star] == UNREACHABLE:
+                            distance[star] = depth
+                            next_frontier.append(star)
+            frontier = next_frontier
+        return distance
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the set of person ids whose name matches, ignoring case.
+        """
+        key = name.lower()
+        start = bisect.bisect_left(self.name_keys, key)
+        end = bisect.bisect_right(self.name_keys, key, lo=start)
+        return {self.person_ids[self.name_people[i]] for i in range(start, end)}
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using a bidirectional
+        breadth-first search over person indices.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return tuple()
+        source = self.person_index(source)
+        target = self.person_index(target)
+        if source is None or target is None:
+            return None
+        return self.search(source, target)
+
+    def search(self, source, target, prune=None):
+        """
+        Returns the shortest (movie_id, person_id) path between two
+        distinct person indices, or None, searching from both ends.
+
+        prune(person, depth, forward) may return True for a person
+        that cannot lie on a shortest path, found at `depth` hops from
+        the source (forward) or the target; it is then not expanded.
+
+        Neighbors come from the adjacency cache when one is set, and
+        are walked from the CSR arrays otherwise.
+        """
+        # Maps person index to the (movie, person) step that reached it
+        forward = {source: None}
+        backward = {target: None}
+        # Per side: visited, frontier, depth and movies already scanned
+        sides = {
+            True: [forward, [source], 0, set()],
+            False: [backward, [target], 0, set()],
+        }
+        adjacency = self.adjacency
+
+        while sides[True][1] and sides[False][1]:
+            is_forward = len(sides[True][1]) <= len(sides[False][1])
+            visited, frontier, depth, scanned = sides[is_forward]
+            other = sides[not is_forward][0]
+
+            next_frontier = []
+            for person in frontier:
+                if adjacency is not None:
+                    steps = adjacency.get(person)
+                else:
+                    steps = self.unscanned_costars(person, scanned)
+                for movie, neighbor in steps:
+                    if neighbor in visited:
+                        continue
+                    if prune is not None and prune(neighbor, depth + 1, is_forward):
+                        continue
+                    visited[neighbor] = (movie, person)
+                    if neighbor in other:
+                        return self.join_paths(forward, backward, neighbor)
+                    next_frontier.append(neighbor)
+
+            sides[is_forward][1] = next_frontier
+            sides[is_forward][2] = depth + 1
+
+        return None
+
+    def unscanned_costars(self, person, scanned):
+        """
+        Yields the (movie, person) index pairs of neighbors through the
+        movies of a person index not in scanned, adding them to it.
+        Every star of a scanned movie has already been reached, so each
+        movie needs walking once a search.
+        """
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for movie in self.movies_of(person):
+            if movie in scanned:
+                continue
+            scanned.add(movie)
+            for star in movie_stars[movie_offsets[movie]:movie_offsets[movie + 1]]:
+                yield movie, star
+
+    def join_paths(self, forward, backward, meeting):
+        """
+        Returns the (movie_id, person_id) path through the person index
+        where the forward and backward searches met.
+        """
+        solution = []
+        person = meeting
+        while forward[person] is not None:
+            movie, parent = forward[person]
+            solution.append((movie, person))
+            person = parent
+        solution.reverse()
+
+        person = meeting
+        while backward[person] is not None:
+            movie, child = backward[person]
+            solution.append((movie, child))
+            person = child
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in solution]
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like degrees.people.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie] for movie in graph.movies_of(person)},
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like degrees.movies.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[star] for star in graph.stars_of(movie)},
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like degrees.names.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        person_ids = self.graph.person_ids_for_name(name)
+        if not person_ids or name != name.lower():
+            raise KeyError(name)
+        return person_ids
+
+    def __iter__(self):
+        previous = None
+        for key in self.graph.name_keys:
+            if key != previous:
+                yield key
+            previous = key
+
+    def __len__(self):
+        return sum(1 for _ in self)
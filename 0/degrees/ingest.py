@@ -0,0 +1,192 @@
+"""
+Parallel, chunked ingestion of a degrees data directory.
+
+Each CSV file is split into byte ranges that start on line boundaries
+and worker processes parse the ranges. Chunks are merged into a
+CompactGraph in file order as they arrive, with only a bounded number
+in flight, so parsed rows never pile up in memory. Quoted fields must
+not contain newlines, which holds for the degrees datasets.
+
+Usage: python ingest.py [directory] [--processes N] [--chunk-size MB]
+"""
+
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import time
+from collections import deque
+
+from graph import CompactGraph
+
+# Columns kept from each file, in the order CompactGraph.build takes them
+COLUMNS = {
+    "people": ("id", "name", "birth"),
+    "movies": ("id", "title", "year"),
+    "stars": ("person_id", "movie_id"),
+}
+
+
+def chunk_ranges(path, chunk_size):
+    """
+    Returns (start, end) byte ranges covering a file. Each range owns
+    the lines that start inside it.
+    """
+    size = os.path.getsize(path)
+    return [(start, min(start + chunk_size, size))
+            for start in range(0, size, chunk_size)] or [(0, 0)]
+
+
+def parse_chunk(path, start, end, indices):
+    """
+    Parses the lines that start in [start, end) of a CSV file,
+    returning (rows, seconds) where rows hold the columns at the
+    given indices.
+    """
+    began = time.perf_counter()
+    lines = []
+    with open(path, "rb") as f:
+        if start:
+            # Move to the first line that starts at or after start
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            lines.append(line)
+
+    reader = csv.reader(io.StringIO(b"".join(lines).decode("utf-8")))
+    if start == 0:
+        # Skip the header
+        next(reader, None)
+    rows = [tuple(row[i] for i in indices) for row in reader if row]
+    return rows, time.perf_counter() - began
+
+
+def header_indices(path, columns):
+    """
+    Returns the positions of the named columns in a CSV file's header.
+    """
+    with open(path, encoding="utf-8") as f:
+        header = next(csv.reader(f))
+    return [header.index(column) for column in columns]
+
+
+class Ingestion():
+    """
+    Parses the three files of a data directory in a process pool,
+    keeping per-file throughput statistics.
+    """
+
+    def __init__(self, directory, processes=None, chunk_size=8 << 20):
+        self.directory = directory
+        self.processes = processes or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.stats = {}
+        # Chunks not yet submitted, and chunks being parsed, in file order
+        self.tasks = deque()
+        self.pending = deque()
+
+    def plan(self, name):
+        """
+        Queues the chunks of one file.
+        """
+        path = f"{self.directory}/{name}.csv"
+        indices = header_indices(path, COLUMNS[name])
+        ranges = chunk_ranges(path, self.chunk_size)
+        self.stats[name] = {"rows": 0, "chunks": len(ranges),
+                            "worker_seconds": 0.0, "seconds": 0.0}
+        for start, end in ranges:
+            self.tasks.append((name, (path, start, end, indices)))
+
+    def submit(self, pool):
+        """
+        Keeps up to two chunks per worker in flight. Later files start
+        parsing while earlier ones are still being merged.
+        """
+        while self.tasks and len(self.pending) < 2 * self.processes:
+            name, arguments = self.tasks.popleft()
+            stats = self.stats[name]
+            if "began" not in stats:
+                stats["began"] = time.perf_counter()
+            self.pending.append((name, pool.apply_async(parse_chunk, arguments)))
+
+    def rows(self, pool, name):
+        """
+        Yields the rows of one file in order as its chunks arrive.
+        """
+        stats = self.stats[name]
+        while True:
+            self.submit(pool)
+            if not self.pending or self.pending[0][0] != name:
+                break
+            rows, seconds = self.pending.popleft()[1].get()
+            stats["rows"] += len(rows)
+            stats["worker_seconds"] += seconds
+            yield from rows
+            del rows
+        stats["seconds"] = time.perf_counter() - stats.pop("began")
+
+    def load(self):
+        """
+        Returns a CompactGraph of the directory's data.
+        """
+        for name in COLUMNS:
+            self.plan(name)
+        with multiprocessing.Pool(self.processes) as pool:
+            return CompactGraph.build(
+                self.rows(pool, "people"),
+                self.rows(pool, "movies"),
+                self.rows(pool, "stars"),
+            )
+
+    def report(self):
+        """
+        Returns one line of throughput per file.
+        """
+        lines = []
+        for name, stats in self.stats.items():
+            seconds = stats["seconds"]
+            rate = stats["rows"] / seconds if seconds else 0.0
+            lines.append(
+                f"{name}.csv: {stats['rows']} rows in {stats['chunks']} chunks, "
+                f"{seconds:.2f}s ({rate:,.0f} rows/s, "
+                f"{stats['worker_seconds']:.2f}s of worker time)"
+            )
+        return lines
+
+
+def load(directory, processes=None, chunk_size=8 << 20):
+    """
+    Returns (graph, ingestion) for a data directory, parsed in parallel.
+    """
+    ingestion = Ingestion(directory, processes, chunk_size)
+    return ingestion.load(), ingestion
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parse a degrees data directory in parallel."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=float, default=8,
+                        help="chunk size in megabytes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph, ingestion = load(args.directory, args.processes,
+                            int(args.chunk_size * (1 << 20)))
+    elapsed = time.perf_counter() - start
+    for line in ingestion.report():
+        print(line)
+    print(f"Loaded {len(graph.person_ids)} people and {len(graph.movie_ids)} "
+          f"movies in {elapsed:.2f}s with {ingestion.processes} processes.")
+
+
+if __name__ == "__main__":
+    main()
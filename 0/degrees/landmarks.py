@@ -0,0 +1,312 @@
+"""
+Landmark distance oracle for the degrees co-star graph.
+
+Hop distances from k well-connected people ("landmarks") to everyone are
+precomputed and stored next to the data. By the triangle inequality, for
+any landmark L and people s, t:
+
+    |d(L, s) - d(L, t)|  <=  d(s, t)  <=  d(L, s) + d(L, t)
+
+which gives instant bounds on separation, answers disconnected pairs
+without a search, and gives a lower bound that can prune the exact
+search, as in the ALT (A*, landmarks, triangle inequality) family of
+algorithms.
+
+Usage: python landmarks.py build [directory] [-k K]
+       python landmarks.py bounds [directory] SOURCE TARGET
+       python landmarks.py bench [directory] [-n N]
+"""
+
+import argparse
+import heapq
+import json
+import mmap
+import os
+import random
+import time
+
+from graph import UNREACHABLE, source_stats
+
+LANDMARKS_MAGIC = b"DEGLMK01"
+
+
+class LandmarkIndex():
+    """
+    Hop distances from a few landmark people to every person
+    of a CompactGraph.
+    """
+
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        # Person indices of the landmarks, and one distance row for each
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Picks the k people with the most co-star links as landmarks
+        and computes the distances from each of them.
+        """
+        def links(person):
+            return sum(graph.movie_offsets[movie + 1] - graph.movie_offsets[movie]
+                       for movie in graph.movies_of(person))
+
+        landmarks = heapq.nlargest(k, range(len(graph.person_ids)), key=links)
+        return cls(graph, landmarks, [graph.distances(landmark)
+                                      for landmark in landmarks])
+
+    def save(self, path, sources=()):
+        """
+        Writes the index to disk, recording the source files it was
+        built from.
+        """
+        header = json.dumps({
+            "sources": source_stats(sources),
+            "people": len(self.graph.person_ids),
+            "landmarks": [self.graph.person_ids[landmark]
+                          for landmark in self.landmarks],
+        }).encode("utf-8")
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(LANDMARKS_MAGIC)
+                f.write(len(header).to_bytes(8, "little"))
+                f.write(header)
+                for row in self.distances:
+                    f.write(row)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @classmethod
+    def open(cls, path, graph, sources=()):
+        """
+        Memory-maps an index written by save, returning None if it is
+        missing, unreadable or does not match the graph and sources.
+        """
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        view = memoryview(mapped)
+        try:
+            if view[:len(LANDMARKS_MAGIC)] != LANDMARKS_MAGIC:
+                return None
+            position = len(LANDMARKS_MAGIC)
+            length = int.from_bytes(view[position:position + 8], "little")
+            position += 8
+            header = json.loads(str(view[position:position + length], "utf-8"))
+            position += length
+            people = header["people"]
+            if (header["sources"] != source_stats(sources)
+                    or people != len(graph.person_ids)
+                    or len(view) != position + people * len(header["landmarks"])):
+                return None
+            landmarks = [graph.person_index(person_id)
+                         for person_id in header["landmarks"]]
+        except (ValueError, KeyError, TypeError):
+            return None
+        if None in landmarks:
+            return None
+
+        distances = [view[position + i * people:position + (i + 1) * people]
+                     for i in range(len(landmarks))]
+        index = cls(graph, landmarks, distances)
+        index.mapped = mapped
+        return index
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between two person indices. lower is None when they are known
+        to be disconnected, and upper is None when no landmark reaches
+        both of them.
+        """
+        if source == target:
+            return 0, 0
+        lower, upper = 1, None
+        for row in self.distances:
+            from_source, from_target = row[source], row[target]
+            if (from_source == UNREACHABLE) != (from_target == UNREACHABLE):
+                return None, None
+            if from_source == UNREACHABLE:
+                continue
+            lower = max(lower, abs(from_source - from_target))
+            if upper is None or from_source + from_target < upper:
+                upper = from_source + from_target
+        return lower, upper
+
+    def shortest_path(self, source, target, prune=False):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        Disconnected pairs are answered from the landmark bounds alone,
+        and the rest by the graph's bidirectional search. With
+        prune=True that search skips every person whose landmark lower
+        bound puts them on no path within the upper bound; checking
+        the bound for every neighbor costs more than it saves on the
+        graphs measured by `python landmarks.py bench`, so it is off
+        by default.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return tuple()
+        graph = self.graph
+        source = graph.person_index(source)
+        target = graph.person_index(target)
+        if source is None or target is None:
+            return None
+        lower, upper = self.bounds(source, target)
+        if lower is None:
+            return None
+        if not prune or upper is None or upper == lower:
+            # Unpruned, or nothing to prune: every shortest path fits
+            # within the bound
+            return graph.search(source, target)
+
+        # Only landmarks that reach both ends say anything about them
+        active = [(row, row[source], row[target]) for row in self.distances
+                  if row[target] != UNREACHABLE]
+
+        def beyond(person, depth, forward):
+            for row, to_source, to_target in active:
+                distance = row[person]
+                remaining = to_target if forward else to_source
+                if depth + abs(distance - remaining) > upper:
+                    return True
+            return False
+
+        return graph.search(source, target, beyond)
+
+
+def bfs_distance(graph, source, target):
+    """
+    Returns the hop distance between two person indices found by a
+    plain one-sided breadth-first search, or None.
+    """
+    visited = {source}
+    frontier = [source]
+    depth = 0
+    while frontier:
+        if target in visited:
+            return depth
+        depth += 1
+        next_frontier = []
+        for person in frontier:
+            for _, neighbor in graph.neighbors(person):
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return depth if target in visited else None
+
+
+def benchmark(graph, index, queries, seed=0):
+    """
+    Times landmark bounds, plain BFS, bidirectional BFS, and the
+    landmark search with and without pruning on random pairs of people,
+    checking that the searches agree.
+    """
+    rng = random.Random(seed)
+    people = len(graph.person_ids)
+    pairs = [(rng.randrange(people), rng.randrange(people))
+             for _ in range(queries)]
+    ids = [(graph.person_ids[source], graph.person_ids[target])
+           for source, target in pairs]
+
+    def timed(search, arguments):
+        start = time.perf_counter()
+        results = [search(*pair) for pair in arguments]
+        return results, time.perf_counter() - start
+
+    bounds, bounds_time = timed(index.bounds, pairs)
+    plain, plain_time = timed(lambda s, t: bfs_distance(graph, s, t), pairs)
+    bidirectional, bidirectional_time = timed(graph.shortest_path, ids)
+    checked, checked_time = timed(index.shortest_path, ids)
+    pruned, pruned_time = timed(
+        lambda s, t: index.shortest_path(s, t, prune=True), ids)
+
+    exact = disconnected = 0
+    for (lower, upper), distance, expected, unpruned, found in zip(
+            bounds, plain, bidirectional, checked, pruned):
+        lengths = {None if path is None else len(path)
+                   for path in (expected, unpruned, found)}
+        if lengths != {distance}:
+            raise AssertionError("searches disagree on a distance")
+        if distance is None:
+            disconnected += lower is None
+        else:
+            if not lower <= distance <= (upper if upper is not None else distance):
+                raise AssertionError("landmark bounds are violated")
+            exact += lower == upper
+    connected = sum(distance is not None for distance in plain)
+
+    print(f"{queries} queries ({connected} connected), "
+          f"{len(index.landmarks)} landmarks")
+    print(f"bounds:            {bounds_time:9.3f}s  "
+          f"{exact} exact, {disconnected} disconnected answered")
+    print(f"plain BFS:         {plain_time:9.3f}s")
+    print(f"bidirectional BFS: {bidirectional_time:9.3f}s")
+    for name, elapsed in (("landmark-checked:", checked_time),
+                          ("landmark-pruned: ", pruned_time)):
+        print(f"{name}  {elapsed:9.3f}s  "
+              f"({plain_time / elapsed if elapsed else 0.0:.1f}x plain, "
+              f"{bidirectional_time / elapsed if elapsed else 0.0:.1f}x "
+              f"bidirectional)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark distance oracle.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build and save the index")
+    build.add_argument("directory", nargs="?", default="large")
+    build.add_argument("-k", type=int, default=16, help="number of landmarks")
+    bounds = commands.add_parser("bounds", help="print separation bounds")
+    bounds.add_argument("directory", nargs="?", default="large")
+    bounds.add_argument("source")
+    bounds.add_argument("target")
+    bench = commands.add_parser("bench", help="compare against plain BFS")
+    bench.add_argument("directory", nargs="?", default="large")
+    bench.add_argument("-n", type=int, default=50, help="number of queries")
+    args = parser.parse_args()
+
+    # degrees imports this module, so only import it when run as a script
+    import degrees
+    degrees.load_data(args.directory, compact=True)
+    graph = degrees.graph
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = LandmarkIndex.build(graph, k=args.k)
+        index.save(degrees.landmarks_path(args.directory),
+                   degrees.data_sources(args.directory))
+        print(f"Built {len(index.landmarks)} landmarks "
+              f"in {time.perf_counter() - start:.1f}s.")
+        return
+
+    if not degrees.load_landmarks(args.directory):
+        raise SystemExit("No landmark index; run: python landmarks.py build")
+    index = degrees.landmarks
+
+    if args.command == "bounds":
+        source = graph.person_index(args.source)
+        target = graph.person_index(args.target)
+        if source is None or target is None:
+            raise SystemExit("Person not found.")
+        lower, upper = index.bounds(source, target)
+        if lower is None:
+            print("Not connected.")
+        else:
+            print(f"lower: {lower}, upper: {'unknown' if upper is None else upper}")
+    else:
+        benchmark(graph, index, args.n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Answer degrees-of-separation queries on several cores.
+
+Takes the same tab-separated input and writes the same JSON lines as
+batch.py, in input order. The data is loaded once in the parent and
+shared with the worker processes: by fork copy-on-write, and through the
+memory-mapped snapshot that every process maps from the page cache.
+Queries are routed to workers by source, so each worker keeps search
+trees for its own sources. Per-worker throughput goes to stderr.
+
+Usage: python server.py [directory] [--input FILE] [--processes N]
+"""
+
+import argparse
+import heapq
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+
+import degrees
+from batch import BatchSearch, read_pairs
+
+# Number of queries sent to a worker in one message
+BATCH_SIZE = 64
+
+# Seconds to wait for a response before checking that the workers live
+LIVENESS_SECONDS = 1.0
+
+
+def worker(directory, max_trees, requests, responses):
+    """
+    Answers batches of (index, source, target) queries until it
+    receives None, then reports its throughput.
+    """
+    if directory is not None:
+        # Started without fork: map the snapshot written by the parent
+        degrees.load_data(directory)
+
+    search = BatchSearch(max_trees=max_trees)
+    answered = 0
+    busy = 0.0
+    while True:
+        batch = requests.get()
+        if batch is None:
+            break
+        start = time.perf_counter()
+        results = [(index, search.answer(source, target))
+                   for index, source, target in batch]
+        busy += time.perf_counter() - start
+        answered += len(batch)
+        responses.put(("results", results))
+    responses.put(("stats", {
+        "pid": os.getpid(),
+        "queries": answered,
+        "busy_seconds": busy,
+        "trees": len(search.trees),
+    }))
+
+
+def write_in_order(responses, workers, output, stats, failures):
+    """
+    Writes results in input order as they arrive and collects
+    the stats of each worker. Stops early, noting the failure, if a
+    worker dies: the results it held will never come.
+    """
+    pending = []
+    next_index = 0
+    finished = 0
+    while finished < len(workers):
+        try:
+            kind, payload = responses.get(timeout=LIVENESS_SECONDS)
+        except queue.Empty:
+            # Workers exit 0 only after sending their stats
+            dead = [process for process in workers
+                    if process.exitcode not in (None, 0)]
+            if dead:
+                failures.extend(
+                    f"worker {process.pid} exited with code {process.exitcode}"
+                    for process in dead
+                )
+                return
+            continue
+        if kind == "stats":
+            stats.append(payload)
+            finished += 1
+            continue
+        for index, record in payload:
+            heapq.heappush(pending, (index, json.dumps(record)))
+        while pending and pending[0][0] == next_index:
+            print(heapq.heappop(pending)[1], file=output, flush=True)
+            next_index += 1
+
+
+def serve(directory, pairs, processes, max_trees=64, output=sys.stdout):
+    """
+    Answers (source, target) pairs with a pool of worker processes,
+    returning the stats of each worker. Raises RuntimeError if a worker
+    dies before answering all of its queries.
+    """
+    if processes < 1:
+        raise ValueError("processes must be at least 1")
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    inherit = context.get_start_method() == "fork"
+
+    requests = [context.Queue() for _ in range(processes)]
+    responses = context.Queue()
+    workers = [
+        context.Process(
+            target=worker,
+            args=(None if inherit else directory, max_trees,
+                  requests[i], responses),
+            daemon=True,
+        )
+        for i in range(processes)
+    ]
+    for process in workers:
+        process.start()
+
+    stats = []
+    failures = []
+    writer = threading.Thread(
+        target=write_in_order, args=(responses, workers, output, stats, failures)
+    )
+    writer.start()
+
+    # Route by source so repeated sources land on the worker holding their tree
+    batches = [[] for _ in range(processes)]
+    for index, (source, target) in enumerate(pairs):
+        i = zlib.crc32(source.lower().encode("utf-8")) % processes
+        batches[i].append((index, source, target))
+        if len(batches[i]) >= BATCH_SIZE:
+            requests[i].put(batches[i])
+            batches[i] = []
+    for i, batch in enumerate(batches):
+        if batch:
+            requests[i].put(batch)
+        requests[i].put(None)
+
+    writer.join()
+    if failures:
+        for process in workers:
+            process.terminate()
+    for process in workers:
+        process.join()
+    if failures:
+        raise RuntimeError("; ".join(failures))
+    return stats
+
+
+def positive_int(value):
+    """Parses a command-line count of at least 1."""
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {count}")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer degrees-of-separation queries on several cores."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--input", type=argparse.FileType("r", encoding="utf-8"),
+                        default=sys.stdin,
+                        help="tab-separated source/target pairs (default: stdin)")
+    parser.add_argument("--processes", type=positive_int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--max-trees", type=int, default=64,
+                        help="number of source search trees kept per worker")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory)
+
+    start = time.perf_counter()
+    try:
+        stats = serve(args.directory, read_pairs(args.input),
+                      args.processes, max_trees=args.max_trees)
+    except RuntimeError as e:
+        sys.exit(f"Worker failed: {e}")
+    elapsed = time.perf_counter() - start
+
+    total = 0
+    for worker_stats in sorted(stats, key=lambda s: s["pid"]):
+        queries, busy = worker_stats["queries"], worker_stats["busy_seconds"]
+        total += queries
+        rate = queries / busy if busy else 0.0
+        print(f"worker {worker_stats['pid']}: {queries} queries, "
+              f"{busy:.3f}s busy, {rate:.1f} queries/s, "
+              f"{worker_stats['trees']} trees", file=sys.stderr)
+    print(f"total: {total} queries in {elapsed:.3f}s "
+          f"({total / elapsed if elapsed else 0.0:.1f} queries/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
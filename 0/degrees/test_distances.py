@@ -0,0 +1,50 @@
+"""
+Round-trip checks for the tables distances.py writes.
+
+Usage: python -m unittest test_distances
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+
+from distances import histogram_rows, write_table
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+COLUMNS = ("distance", "pairs", "fraction")
+
+
+class HistogramTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = histogram_rows({0: 3.0, 1: 4.5, 2: 1.5}, 0.0, 3)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_csv(self):
+        path = os.path.join(self.directory, "histogram.csv")
+        write_table(path, COLUMNS, self.rows)
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], list(COLUMNS))
+        self.assertEqual([row[0] for row in rows[1:]], ["0", "1", "2", ""])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        path = os.path.join(self.directory, "histogram.parquet")
+        write_table(path, COLUMNS, self.rows)
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.column_names, list(COLUMNS))
+        self.assertEqual(table.column("distance").to_pylist(), [0, 1, 2, None])
+        self.assertEqual(table.column("pairs").to_pylist(), [3, 4, 2, 0])
+        self.assertEqual(table.to_pylist()[-1]["fraction"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -6,6 +9,48 @@ class Node():
 
 
 class StackFrontier():
+    def __init__(self):
+        self.frontier = deque()
+        # Maps each state in the frontier to the number of nodes holding it
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.pop()
+            count = self.states[node.state] - 1
+            if count:
+                self.states[node.state] = count
+            else:
+                del self.states[node.state]
+            return node
+
+    def pop(self):
+        return self.frontier.pop()
+
+
+class QueueFrontier(StackFrontier):
+
+    def pop(self):
+        return self.frontier.popleft()
+
+
+class ListStackFrontier():
+    """
+    List-backed frontier with linear-time membership tests,
+    kept as a reference for benchmarking.
+    """
     def __init__(self):
         self.frontier = []
 
@@ -27,7 +72,7 @@ class StackFrontier():
             return node
 
 
-class QueueFrontier(StackFrontier):
+class ListQueueFrontier(ListStackFrontier):
 
     def remove(self):
         if self.empty():
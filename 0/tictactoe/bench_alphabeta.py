@@ -0,0 +1,66 @@
+"""
+Compare tictactoe.py's plain minimax with tictactoe_ab.py's alpha-beta
+search on the empty board and a few openings, each from an empty
+transposition table and without the opening book.
+
+Positions searched are the transposition table misses, which both
+modules count the same way.
+
+Usage: python bench_alphabeta.py [--repeat N]
+"""
+
+import argparse
+import time
+
+import tictactoe as plain
+import tictactoe_ab as ab
+
+X, O, _ = plain.X, plain.O, plain.EMPTY
+
+BOARDS = {
+    "empty": plain.initial_state(),
+    "corner": [[X, _, _], [_, _, _], [_, _, _]],
+    "center": [[_, _, _], [_, X, _], [_, _, _]],
+    "edge reply": [[_, _, _], [_, X, _], [_, O, _]],
+}
+
+
+def run(module, board, repeat):
+    """
+    Returns (action, seconds per search, positions searched).
+    """
+    elapsed = 0.0
+    for _ in range(repeat):
+        module.table.clear()
+        start = time.perf_counter()
+        action = module.minimax(board)
+        elapsed += time.perf_counter() - start
+    return action, elapsed / repeat, module.table.misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Time the search itself, not the book
+    plain.opening_book = None
+
+    for name, board in BOARDS.items():
+        _, plain_time, plain_searched = run(plain, board, args.repeat)
+        _, ab_time, ab_searched = run(ab, board, args.repeat)
+        report = ab.stats.report()
+        branching = " ".join(f"{depth}:{factor:.2f}"
+                             for depth, factor in report["branching"].items())
+        print(f"{name}")
+        print(f"  minimax     {plain_time * 1000:>9.2f}ms "
+              f"{plain_searched:>7} positions")
+        print(f"  alpha-beta  {ab_time * 1000:>9.2f}ms "
+              f"{ab_searched:>7} positions  {report['nodes']} nodes "
+              f"{report['cutoffs']} cutoffs  "
+              f"speedup {plain_time / ab_time:.1f}x")
+        print(f"  branching by depth  {branching}")
+
+
+if __name__ == "__main__":
+    main()
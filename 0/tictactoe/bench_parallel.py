@@ -0,0 +1,54 @@
+"""
+Compare tictactoe_ab's serial minimax with parallel_minimax over a
+range of process counts on a 4x4 board (four in a row wins), where a
+full search takes seconds rather than milliseconds.
+
+Usage: python bench_parallel.py [--processes N ...]
+"""
+
+import argparse
+import os
+import time
+
+import tictactoe_ab as ttt
+
+X, O, _ = ttt.X, ttt.O, ttt.EMPTY
+
+# Two moves in, so the serial search takes several seconds
+BOARD = [
+    [X, _, _, _],
+    [_, _, _, _],
+    [_, _, O, _],
+    [_, _, _, _],
+]
+
+
+def run(search, *args):
+    # Each run starts from an empty transposition table
+    ttt.table.clear()
+    start = time.perf_counter()
+    action = search(BOARD, *args)
+    return action, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    cores = os.cpu_count()
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores}),
+                        help="process counts to try")
+    args = parser.parse_args()
+
+    serial_action, serial = run(ttt.minimax)
+    print(f"{cores} cores")
+    print(f"{'serial':>10} {serial:>9.3f}s  move {serial_action}")
+    for processes in args.processes:
+        action, elapsed = run(ttt.parallel_minimax, processes)
+        print(f"{processes:>6} proc {elapsed:>9.3f}s  move {action}  "
+              f"speedup {serial / elapsed:.2f}x")
+        if action != serial_action:
+            raise SystemExit(f"parallel move {action} differs from serial")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Bitboard Tic Tac Toe Player
+
+A state is a pair of 9-bit ints (x, o) with bit i * 3 + j set when
+that player holds cell (i, j). Everything a search needs is a table
+lookup or a few integer operations on those ints. from_board, to_board,
+from_action and to_action convert to and from the list-of-lists boards
+and (i, j) actions used by tictactoe.py and runner.py.
+"""
+
+from functools import lru_cache
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+WIN_MASKS = (
+    # horizontal
+    0b000000111, 0b000111000, 0b111000000,
+    # diagonal
+    0b100010001, 0b001010100,
+    # vertical
+    0b001001001, 0b010010010, 0b100100100,
+)
+
+# Indexed by any 9-bit set of cells
+POPCOUNT = tuple(bin(cells).count("1") for cells in range(FULL + 1))
+WINNING = tuple(any(cells & mask == mask for mask in WIN_MASKS)
+                for cells in range(FULL + 1))
+CELLS = tuple(tuple(k for k in range(9) if cells >> k & 1)
+              for cells in range(FULL + 1))
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def player(state):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = state
+    return X if POPCOUNT[x] == POPCOUNT[o] else O
+
+
+def actions(state):
+    """
+    Returns the cells (0-8) available on the board.
+    """
+    x, o = state
+    return CELLS[FULL & ~(x | o)]
+
+
+def result(state, cell):
+    """
+    Returns the state that results from playing a cell.
+    """
+    x, o = state
+    # Check the cell before shifting, which rejects negative cells itself
+    if not isinstance(cell, int) or not 0 <= cell < 9:
+        raise Exception(f'invalid action {cell}')
+    bit = 1 << cell
+    if (x | o) & bit:
+        raise Exception(f'invalid action {cell}')
+    if POPCOUNT[x] == POPCOUNT[o]:
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = state
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = state
+    return WINNING[x] or WINNING[o] or (x | o) == FULL
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = state
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+@lru_cache(maxsize=None)
+def negamax(mover, other):
+    """
+    Returns (value, cell) for the player to move, holding `mover`,
+    where value is 1 for a win, -1 for a loss and 0 for a draw.
+    """
+    if WINNING[other]:
+        return -1, None
+    free = FULL & ~(mover | other)
+    if not free:
+        return 0, None
+    best, best_cell = -2, None
+    for cell in CELLS[free]:
+        value = -negamax(other, mover | 1 << cell)[0]
+        if value > best:
+            best, best_cell = value, cell
+            if best == 1:
+                break
+    return best, best_cell
+
+
+def minimax(state):
+    """
+    Returns the optimal cell for the current player on the board.
+    """
+    if terminal(state):
+        return None
+    x, o = state
+    if POPCOUNT[x] == POPCOUNT[o]:
+        return negamax(x, o)[1]
+    return negamax(o, x)[1]
+
+
+def from_board(board):
+    """
+    Returns the state of a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (i * 3 + j)
+            elif cell == O:
+                o |= 1 << (i * 3 + j)
+    return (x, o)
+
+
+def to_board(state):
+    """
+    Returns the list-of-lists board of a state.
+    """
+    x, o = state
+    return [[X if x >> (i * 3 + j) & 1 else O if o >> (i * 3 + j) & 1 else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def from_action(action):
+    """
+    Returns the cell of an (i, j) action.
+    """
+    i, j = action
+    return i * 3 + j
+
+
+def to_action(cell):
+    """
+    Returns the (i, j) action of a cell.
+    """
+    return None if cell is None else divmod(cell, 3)
+
+
+def board_minimax(board):
+    """
+    Returns the optimal (i, j) action on a list-of-lists board, for
+    callers such as runner.py that use tictactoe.py's representation.
+    """
+    return to_action(minimax(from_board(board)))
@@ -0,0 +1,153 @@
+"""
+Perfect-play opening book for Tic Tac Toe.
+
+Solves the whole game once and stores the best move for every
+reachable position in book.bin: one byte per base-3 board code (3^9
+entries), holding the best cell i * 3 + j, or NO_MOVE for positions
+that are unreachable or over. tictactoe.minimax answers from the book
+in O(1) and falls back to live search when it is missing.
+
+Usage: python book.py build
+       python book.py verify
+"""
+
+import os
+import sys
+
+import bitboard
+
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+POSITIONS = 3 ** 9
+NO_MOVE = 255
+
+CODES = {None: 0, "X": 1, "O": 2}
+POWERS = tuple(3 ** k for k in range(9))
+
+
+def code(board):
+    """
+    Returns the base-3 code of a board, cell i * 3 + j being digit
+    i * 3 + j with 0 for empty, 1 for X and 2 for O.
+    """
+    return sum(CODES[cell] * power
+               for cell, power in zip((cell for row in board for cell in row), POWERS))
+
+
+def state_code(state):
+    """
+    Returns the base-3 code of a bitboard state.
+    """
+    x, o = state
+    return sum((1 if x >> k & 1 else 2 if o >> k & 1 else 0) * POWERS[k]
+               for k in range(9))
+
+
+def reachable(state=None, seen=None):
+    """
+    Returns every state reachable from a state (by default the empty
+    board) by legal play.
+    """
+    if state is None:
+        state = bitboard.initial_state()
+    if seen is None:
+        seen = set()
+    stack = [state]
+    while stack:
+        state = stack.pop()
+        if state in seen:
+            continue
+        seen.add(state)
+        if not bitboard.terminal(state):
+            stack.extend(bitboard.result(state, cell)
+                         for cell in bitboard.actions(state))
+    return seen
+
+
+def build():
+    """
+    Returns the book as bytes.
+    """
+    book = bytearray([NO_MOVE]) * POSITIONS
+    for state in reachable():
+        if not bitboard.terminal(state):
+            book[state_code(state)] = bitboard.minimax(state)
+    return bytes(book)
+
+
+def save(book, path=BOOK):
+    with open(path, "wb") as f:
+        f.write(book)
+
+
+def load(path=BOOK):
+    """
+    Returns the book saved at path, or None if it is missing or not
+    a book.
+    """
+    try:
+        with open(path, "rb") as f:
+            book = f.read()
+    except OSError:
+        return None
+    return book if len(book) == POSITIONS else None
+
+
+def lookup(book, board):
+    """
+    Returns the book's (i, j) move for a board, or None.
+    """
+    cell = book[code(board)]
+    if cell == NO_MOVE:
+        return None
+    return divmod(cell, 3)
+
+
+def verify(book):
+    """
+    Checks the book against tictactoe.py's live search, returning the
+    boards whose book move is missing or loses value.
+    """
+    # tictactoe imports this module, so only import it when verifying
+    import tictactoe as ttt
+
+    def value(board):
+        state = ttt.GameState(board)
+        if state.player() == ttt.X:
+            return ttt.max_value(state)[0]
+        return ttt.min_value(state)[0]
+
+    wrong = []
+    for state in reachable():
+        if bitboard.terminal(state):
+            continue
+        board = bitboard.to_board(state)
+        action = lookup(book, board)
+        if action is None or value(ttt.result(board, action)) != value(board):
+            wrong.append(board)
+    return wrong
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in ("build", "verify"):
+        sys.exit("Usage: python book.py build|verify")
+
+    if sys.argv[1] == "build":
+        book = build()
+        save(book)
+        moves = sum(cell != NO_MOVE for cell in book)
+        print(f"Wrote {moves} positions to {BOOK}.")
+        return
+
+    book = load()
+    if book is None:
+        sys.exit("No book; run: python book.py build")
+    wrong = verify(book)
+    for board in wrong:
+        print(f"wrong move for {board}")
+    print(f"{len(wrong)} wrong moves.")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Monte Carlo Tree Search Tic Tac Toe Player
+
+An anytime UCT player for boards too big for exhaustive minimax. The
+tree is grown through a game module's player/actions/result/terminal/
+utility functions (tictactoe.py by default, or tictactoe_ab.py for
+n x n boards), and each expanded leaf is scored by a batch of random
+playouts. Playouts run on a flat copy of the board against the
+n-in-a-row lines from tictactoe_ab.win_conditions, vectorized with
+numpy when it is installed and in a plain Python loop otherwise.
+
+The tree below the move played is kept, so after the opponent replies
+the search picks up from the matching grandchild of the last root.
+
+Usage: python mcts.py [N] [--playouts N]
+"""
+
+import argparse
+import math
+import random
+import time
+
+import tictactoe
+from tictactoe_ab import win_conditions
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CODES = {None: 0, "X": 1, "O": 2}
+
+
+class Node():
+    """
+    A position in the search tree, with the score of the player who
+    moved into it: 1 per win and 0.5 per draw over its playouts.
+    """
+
+    def __init__(self, board, parent, action, untried):
+        self.board = board
+        self.parent = parent
+        self.action = action
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        self.score = 0.0
+
+
+class MCTS():
+    """
+    UCT search with a playout budget per move, optionally capped by
+    time, and tree reuse between moves.
+    """
+
+    def __init__(self, game=tictactoe, playouts=2000, batch=16,
+                 seconds=None, exploration=math.sqrt(2), seed=None):
+        self.game = game
+        self.playouts = playouts
+        self.batch = batch
+        self.seconds = seconds
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.numpy_random = numpy.random.default_rng(seed) if numpy is not None else None
+        self.root = None
+        # Playouts made and inherited from the previous search by the last move
+        self.searched = 0
+        self.reused = 0
+
+    def node(self, board, parent=None, action=None):
+        untried = []
+        if not self.game.terminal(board):
+            untried = sorted(self.game.actions(board))
+            self.random.shuffle(untried)
+        return Node(board, parent, action, untried)
+
+    def reuse(self, board):
+        """
+        Returns the node of the tree kept from the last search that
+        matches board, or a new root.
+        """
+        root = self.root
+        if root is not None:
+            if root.board == board:
+                return root
+            for child in root.children.values():
+                if child.board == board:
+                    child.parent = None
+                    return child
+        return self.node(board)
+
+    def minimax(self, board):
+        """
+        Returns the best action found for the current player on the
+        board, named after tictactoe.minimax so it can stand in for it.
+        """
+        if self.game.terminal(board):
+            return None
+
+        root = self.reuse(board)
+        self.reused = root.visits
+        self.searched = 0
+        deadline = None if self.seconds is None else time.perf_counter() + self.seconds
+        # Iterate until the root has a child to play whatever the budget,
+        # then for as long as the budget lasts
+        while (not root.children
+               or self.searched < self.playouts
+               and (deadline is None or time.perf_counter() <= deadline)):
+            self.searched += self.iterate(root)
+
+        action, child = max(root.children.items(),
+                            key=lambda item: item[1].visits)
+        # Keep the tree under the move played for the next search
+        child.parent = None
+        self.root = child
+        return action
+
+    def iterate(self, root):
+        """
+        Selects a leaf, expands it and backs up a batch of playouts from
+        it, returning the number of playouts made.
+        """
+        node = root
+        while not node.untried and node.children:
+            node = self.select(node)
+        if node.untried:
+            action = node.untried.pop()
+            child = self.node(self.game.result(node.board, action), node, action)
+            node.children[action] = child
+            node = child
+
+        if self.game.terminal(node.board):
+            utility = self.game.utility(node.board)
+            x_wins = self.batch if utility == 1 else 0
+            o_wins = self.batch if utility == -1 else 0
+        elif numpy is not None:
+            x_wins, o_wins = self.playouts_numpy(node.board)
+        else:
+            x_wins, o_wins = self.playouts_python(node.board)
+        draws = self.batch - x_wins - o_wins
+
+        while node.parent is not None:
+            # The player who moved into node is the one not to move in it
+            if self.game.player(node.board) == "O":
+                wins = x_wins
+            else:
+                wins = o_wins
+            node.visits += self.batch
+            node.score += wins + 0.5 * draws
+            node = node.parent
+        node.visits += self.batch
+        return self.batch
+
+    def select(self, node):
+        """
+        Returns the child of a node with the best UCT value.
+        """
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+
+        def uct(child):
+            return (child.score / child.visits
+                    + exploration * math.sqrt(log_visits / child.visits))
+
+        return max(node.children.values(), key=uct)
+
+    def flat(self, board):
+        """
+        Returns (cells, lines, mover) for a board: cell codes in row
+        order, its winning lines as cell indices, and the code of the
+        player to move.
+        """
+        n = len(board)
+        cells = [CODES[cell] for row in board for cell in row]
+        lines = [[i * n + j for i, j in line] for line in win_conditions(n)]
+        return cells, lines, CODES[self.game.player(board)]
+
+    def playouts_numpy(self, board):
+        """
+        Returns (X wins, O wins) over a batch of random playouts.
+
+        Each playout fills the empty cells in a random order, players
+        alternating. A line is won when the last of its cells is
+        filled, so the game's winner is the owner of the line finished
+        first.
+        """
+        cells, lines, mover = self.flat(board)
+        cells = numpy.array(cells, dtype=numpy.int8)
+        lines = numpy.array(lines)
+        empty = numpy.flatnonzero(cells == 0)
+        batch = self.batch
+
+        # Turn on which each empty cell is filled, per playout
+        turns = numpy.argsort(self.numpy_random.random((batch, len(empty))), axis=1)
+        turns = numpy.argsort(turns, axis=1)
+        owner = numpy.tile(cells, (batch, 1))
+        owner[:, empty] = numpy.where(turns % 2 == 0, mover, 3 - mover)
+        filled = numpy.full((batch, len(cells)), -1)
+        filled[:, empty] = turns
+
+        finished = filled[:, lines].max(axis=2)
+        line_owner = owner[:, lines]
+        never = len(cells)
+        x_first = numpy.where((line_owner == 1).all(axis=2), finished, never).min(axis=1)
+        o_first = numpy.where((line_owner == 2).all(axis=2), finished, never).min(axis=1)
+        return int((x_first < o_first).sum()), int((o_first < x_first).sum())
+
+    def playouts_python(self, board):
+        """
+        Returns (X wins, O wins) over a batch of random playouts, one at
+        a time.
+        """
+        cells, lines, mover = self.flat(board)
+        empty = [cell for cell, code in enumerate(cells) if code == 0]
+        cell_lines = [[] for _ in cells]
+        for line in lines:
+            for cell in line:
+                cell_lines[cell].append(line)
+
+        x_wins = o_wins = 0
+        for _ in range(self.batch):
+            playout = list(cells)
+            order = list(empty)
+            self.random.shuffle(order)
+            code = mover
+            for cell in order:
+                playout[cell] = code
+                if any(all(playout[k] == code for k in line) for line in cell_lines[cell]):
+                    if code == 1:
+                        x_wins += 1
+                    else:
+                        o_wins += 1
+                    break
+                code = 3 - code
+        return x_wins, o_wins
+
+
+def main():
+    import tictactoe_ab
+
+    parser = argparse.ArgumentParser(description="MCTS self-play.")
+    parser.add_argument("n", type=int, nargs="?", default=3, help="board size")
+    parser.add_argument("--playouts", type=int, default=2000)
+    args = parser.parse_args()
+
+    # tictactoe.py only knows 3x3 boards
+    game = tictactoe if args.n == 3 else tictactoe_ab
+    players = {"X": MCTS(game, args.playouts, seed=1),
+               "O": MCTS(game, args.playouts, seed=2)}
+    board = tictactoe_ab.initial_state(args.n)
+    while not game.terminal(board):
+        mover = game.player(board)
+        start = time.perf_counter()
+        action = players[mover].minimax(board)
+        elapsed = time.perf_counter() - start
+        print(f"{mover} plays {action}: {players[mover].searched} playouts "
+              f"({players[mover].reused} reused), {elapsed:.2f}s")
+        board = game.result(board, action)
+    winner = game.winner(board)
+    print("Tie." if winner is None else f"{winner} wins.")
+
+
+if __name__ == "__main__":
+    main()
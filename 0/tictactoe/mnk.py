@@ -0,0 +1,327 @@
+"""
+m,n,k-game engine: alpha-beta search for Tic Tac Toe generalized to an
+m x n board where k in a row wins (3,3,3 is Tic Tac Toe, 5,5,4 a small
+variant, 15,15,5 gomoku).
+
+Full-depth search is hopeless on large boards, so the engine deepens
+iteratively under a hard wall-clock budget per move and always has the
+best move of the deepest finished iteration to return. Moves are ordered
+with the previous best move first, then killer moves (quiet moves that
+caused a cutoff at the same ply) and the history heuristic (moves that
+caused cutoffs anywhere). Leaves are scored by a heuristic that counts
+the stones each player has in windows of k cells the opponent has not
+blocked.
+
+Usage: python mnk.py M N K [--budget SECONDS]
+"""
+
+import argparse
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won position, less the plies taken to win it
+WIN = 10 ** 9
+
+# Nodes searched between clock checks (a power of two); 15,15,5 runs
+# about 40 nodes a millisecond, so the budget overshoots by ~1ms at most
+CLOCK_NODES = 32
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+    """
+    Geometry of an m x n board where k in a row wins.
+    """
+
+    def __init__(self, m, n, k):
+        if not 1 <= k <= max(m, n):
+            raise ValueError(f"k must be between 1 and {max(m, n)}")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.size = m * n
+
+        # Every window of k cells in a row, column or diagonal
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(tuple(
+                            (i + di * step) * n + (j + dj * step)
+                            for step in range(k)
+                        ))
+        self.cell_lines = [[] for _ in range(self.size)]
+        for line, cells in enumerate(self.lines):
+            for cell in cells:
+                self.cell_lines[cell].append(line)
+
+        # Cells within two steps of each cell, where replies are searched
+        self.nearby = [
+            [ni * n + nj
+             for ni in range(max(0, i - 2), min(m, i + 3))
+             for nj in range(max(0, j - 2), min(n, j + 3))
+             if (ni, nj) != (i, j)]
+            for i in range(m) for j in range(n)
+        ]
+        self.center = (m // 2) * n + n // 2
+
+        # Value of s stones in an unblocked window: 0, 1, 10, 100, ...
+        self.weights = [0] + [10 ** (s - 1) for s in range(1, k + 1)]
+
+
+class Position():
+    """
+    Mutable game position that applies and undoes moves while keeping
+    the per-window stone counts and heuristic score up to date.
+    """
+
+    def __init__(self, game, board=None):
+        self.game = game
+        self.cells = [EMPTY] * game.size
+        self.x_counts = [0] * len(game.lines)
+        self.o_counts = [0] * len(game.lines)
+        # Heuristic score from X's point of view
+        self.score = 0
+        self.moves = []
+        self.won = None
+        if board is not None:
+            x_cells = [i * game.n + j for i, row in enumerate(board)
+                       for j, cell in enumerate(row) if cell == X]
+            o_cells = [i * game.n + j for i, row in enumerate(board)
+                       for j, cell in enumerate(row) if cell == O]
+            if not 0 <= len(x_cells) - len(o_cells) <= 1:
+                raise ValueError("X moves first and players alternate")
+            for x_cell, o_cell in zip(x_cells, o_cells):
+                self.play(x_cell)
+                self.play(o_cell)
+            if len(x_cells) > len(o_cells):
+                self.play(x_cells[-1])
+
+    def player(self):
+        return X if len(self.moves) % 2 == 0 else O
+
+    def value(self, x_count, o_count):
+        weights = self.game.weights
+        if o_count == 0:
+            return weights[x_count]
+        if x_count == 0:
+            return -weights[o_count]
+        return 0
+
+    def play(self, cell):
+        """
+        Plays a cell for the player to move.
+        """
+        mark = self.player()
+        self.cells[cell] = mark
+        self.moves.append((cell, self.won))
+        counts = self.x_counts if mark == X else self.o_counts
+        for line in self.game.cell_lines[cell]:
+            before = self.value(self.x_counts[line], self.o_counts[line])
+            counts[line] += 1
+            self.score += self.value(self.x_counts[line], self.o_counts[line]) - before
+            if counts[line] == self.game.k:
+                self.won = mark
+
+    def undo(self):
+        """
+        Takes back the last move.
+        """
+        cell, self.won = self.moves.pop()
+        mark = self.cells[cell]
+        self.cells[cell] = EMPTY
+        counts = self.x_counts if mark == X else self.o_counts
+        for line in self.game.cell_lines[cell]:
+            before = self.value(self.x_counts[line], self.o_counts[line])
+            counts[line] -= 1
+            self.score += self.value(self.x_counts[line], self.o_counts[line]) - before
+
+    def full(self):
+        return len(self.moves) == self.game.size
+
+    def candidates(self):
+        """
+        Returns the empty cells worth searching: near a stone, or the
+        center of an empty board. Small boards search every empty cell.
+        """
+        cells = self.cells
+        if self.game.size <= 25:
+            return [cell for cell in range(self.game.size) if cells[cell] is EMPTY]
+        if not self.moves:
+            return [self.game.center]
+        nearby = set()
+        for cell, _ in self.moves:
+            nearby.update(self.game.nearby[cell])
+        return [cell for cell in nearby if cells[cell] is EMPTY]
+
+
+class Engine():
+    """
+    Iterative-deepening alpha-beta search with killer and history move
+    ordering under a wall-clock budget per move.
+    """
+
+    def __init__(self, game, budget=1.0, max_depth=None):
+        self.game = game
+        self.budget = budget
+        self.max_depth = max_depth or game.size
+        self.history = [0] * game.size
+        self.killers = [[None, None] for _ in range(game.size + 1)]
+        # Nodes searched and deepest finished iteration of the last search
+        self.nodes = 0
+        self.depth = 0
+
+    def best_move(self, board):
+        """
+        Returns the best (i, j) move for the player to move on a
+        list-of-lists board, or None if the game is over.
+        """
+        position = Position(self.game, board)
+        if position.won is not None or position.full():
+            return None
+        return divmod(self.search(position), self.game.n)
+
+    def search(self, position):
+        """
+        Returns the best cell found within the budget.
+        """
+        self.deadline = time.perf_counter() + self.budget
+        self.nodes = 0
+        self.killers = [[None, None] for _ in range(self.game.size + 1)]
+        self.history = [score // 2 for score in self.history]
+
+        moves = self.order(position.candidates(), 0)
+        best = moves[0]
+        self.depth = 0
+        for depth in range(1, min(self.max_depth, self.game.size - len(position.moves)) + 1):
+            self.iteration_best = None
+            try:
+                value, cell = self.root(position, moves, depth)
+            except Timeout:
+                # Root moves finished at this depth beat the shallower answer,
+                # since the previous best move is always searched first
+                if self.iteration_best is not None:
+                    best = self.iteration_best[1]
+                break
+            best = cell
+            self.depth = depth
+            # Search the best move first next time
+            moves.remove(cell)
+            moves.insert(0, cell)
+            if abs(value) >= WIN - self.game.size:
+                break
+        return best
+
+    def root(self, position, moves, depth):
+        alpha, beta = -WIN - 1, WIN + 1
+        best_value, best_cell = -WIN - 1, moves[0]
+        for cell in moves:
+            if time.perf_counter() > self.deadline:
+                raise Timeout
+            position.play(cell)
+            try:
+                value = -self.negamax(position, depth - 1, -beta, -alpha, 1)
+            finally:
+                position.undo()
+            if value > best_value:
+                best_value, best_cell = value, cell
+                self.iteration_best = (best_value, best_cell)
+            alpha = max(alpha, value)
+        return best_value, best_cell
+
+    def negamax(self, position, depth, alpha, beta, ply):
+        """
+        Returns the value of a position for the player to move.
+        """
+        self.nodes += 1
+        if self.nodes & (CLOCK_NODES - 1) == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        if position.won is not None:
+            # The previous move won
+            return -(WIN - ply)
+        if position.full():
+            return 0
+        if depth == 0:
+            return position.score if position.player() == X else -position.score
+
+        moves = self.order(position.candidates(), ply)
+        best = -WIN - 1
+        for cell in moves:
+            position.play(cell)
+            try:
+                value = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                position.undo()
+            if value > best:
+                best = value
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                killers = self.killers[ply]
+                if killers[0] != cell:
+                    killers[1] = killers[0]
+                    killers[0] = cell
+                self.history[cell] += depth * depth
+                break
+        return best
+
+    def order(self, moves, ply):
+        """
+        Returns moves with the killers of a ply first, then by
+        history score.
+        """
+        killers = self.killers[ply]
+        history = self.history
+
+        def key(cell):
+            if cell == killers[0]:
+                return (0, 0)
+            if cell == killers[1]:
+                return (1, 0)
+            return (2, -history[cell])
+
+        return sorted(moves, key=key)
+
+
+def render(game, position):
+    return "\n".join(
+        " ".join(position.cells[i * game.n + j] or "." for j in range(game.n))
+        for i in range(game.m)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play on an m,n,k board.")
+    parser.add_argument("m", type=int)
+    parser.add_argument("n", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds per move")
+    args = parser.parse_args()
+
+    game = Game(args.m, args.n, args.k)
+    engine = Engine(game, budget=args.budget)
+    position = Position(game)
+    while position.won is None and not position.full():
+        start = time.perf_counter()
+        cell = engine.search(position)
+        elapsed = time.perf_counter() - start
+        mover = position.player()
+        position.play(cell)
+        print(f"{mover} plays {divmod(cell, game.n)}: depth {engine.depth}, "
+              f"{engine.nodes} nodes, {elapsed:.2f}s")
+        print(render(game, position))
+    print("Tie." if position.won is None else f"{position.won} wins.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Profile tictactoe.minimax solving the game from scratch: no opening
+book and an empty transposition table for every search.
+
+Prints the total time and function calls, then the functions that took
+the most time, as reported by cProfile.
+
+Usage: python profile_search.py [--repeat N] [--top N]
+"""
+
+import argparse
+import cProfile
+import pstats
+
+import tictactoe as ttt
+
+X, O, _ = ttt.X, ttt.O, ttt.EMPTY
+
+BOARDS = (
+    ttt.initial_state(),
+    [[X, _, _], [_, _, _], [_, _, _]],
+    [[_, _, _], [_, X, _], [_, _, _]],
+    [[_, _, _], [_, X, _], [_, O, _]],
+)
+
+
+def solve(repeat):
+    for _ in range(repeat):
+        for board in BOARDS:
+            ttt.table.clear()
+            ttt.minimax(board)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    ttt.opening_book = None
+    profiler = cProfile.Profile()
+    profiler.runcall(solve, args.repeat)
+
+    stats = pstats.Stats(profiler)
+    print(f"{stats.total_calls} function calls in {stats.total_tt:.3f}s "
+          f"({args.repeat} x {len(BOARDS)} searches)")
+    stats.strip_dirs().sort_stats("tottime").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Background move computation for runner.py.
+
+A MoveProvider runs a search function such as tictactoe.minimax in a
+worker process, so the pygame loop can keep drawing frames while the
+computer thinks. The loop requests a move once and then polls every
+frame; cancelling (when a game is reset mid-search) kills the worker,
+and a fresh one is started for the next request.
+"""
+
+import multiprocessing
+
+
+def serve(conn, search):
+    """
+    Answers boards received on a connection with search(board) until
+    it receives None.
+    """
+    while True:
+        board = conn.recv()
+        if board is None:
+            break
+        conn.send(search(board))
+
+
+class MoveProvider():
+    """
+    Computes moves with a search function in a worker process.
+
+    A worker that dies (say the search raised) is replaced and asked
+    for the same board once more. If that one dies too, `failed` is
+    set and no move comes until the next request or cancel.
+    """
+
+    def __init__(self, search):
+        self.search = search
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.process = None
+        self.conn = None
+        self.pending = False
+        self.board = None
+        self.retried = False
+        self.failed = False
+
+    def start(self):
+        self.conn, worker_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=serve, args=(worker_conn, self.search), daemon=True
+        )
+        self.process.start()
+        worker_conn.close()
+
+    def request(self, board):
+        """
+        Starts searching a board, abandoning any search in progress.
+        """
+        self.cancel()
+        self.board = board
+        self.retried = False
+        self.failed = False
+        self.send()
+
+    def send(self):
+        if self.process is None:
+            self.start()
+        try:
+            self.conn.send(self.board)
+        except OSError:
+            # The idle worker died; a fresh one gets the board
+            self.discard()
+        if self.process is None:
+            self.start()
+            self.conn.send(self.board)
+        self.pending = True
+
+    def poll(self):
+        """
+        Returns the move for the requested board once it is ready,
+        else None.
+        """
+        if not self.pending:
+            return None
+        try:
+            if not self.conn.poll():
+                return None
+            move = self.conn.recv()
+        except (EOFError, OSError):
+            # The worker died before answering
+            died = True
+        else:
+            died = False
+        if died:
+            self.discard()
+            if self.retried:
+                self.failed = True
+            else:
+                self.retried = True
+                self.send()
+            return None
+        self.pending = False
+        return move
+
+    def cancel(self):
+        """
+        Abandons the search in progress, if any, by stopping the worker.
+        """
+        self.failed = False
+        if self.pending:
+            self.discard()
+
+    def discard(self):
+        """
+        Stops the worker, whatever it is doing, and forgets it.
+        """
+        self.pending = False
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def close(self):
+        self.cancel()
+        if self.process is not None:
+            try:
+                self.conn.send(None)
+            except OSError:
+                self.process.terminate()
+            self.process.join()
+            self.conn.close()
+            self.process = None
+            self.conn = None
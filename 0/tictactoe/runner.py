@@ -3,6 +3,17 @@ import sys
 import time
 
 import tictactoe as ttt
+from mcts import MCTS
+from provider import MoveProvider
+
+# Search for the computer's moves: python runner.py [minimax|mcts]
+engines = {
+    "minimax": ttt.minimax,
+    "mcts": MCTS().minimax,
+}
+engine = sys.argv[1] if len(sys.argv) > 1 else "minimax"
+if engine not in engines:
+    sys.exit("Usage: python runner.py [minimax|mcts]")
 
 pygame.init()
 size = width, height = 600, 400
@@ -17,14 +28,21 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Frames per second, kept up while the computer thinks
+fps = 60
+clock = pygame.time.Clock()
+
+# Searches for the computer's moves in a worker process
+provider = MoveProvider(engines[engine])
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            provider.close()
             sys.exit()
 
     screen.fill(black)
@@ -99,6 +117,8 @@ while True:
                 title = f"Game Over: Tie."
             else:
                 title = f"Game Over: {winner} wins."
+        elif provider.failed:
+            title = f"Computer failed to move."
         elif user == player:
             title = f"Play as {user}"
         else:
@@ -109,14 +129,13 @@ while True:
         screen.blit(title, titleRect)
 
         # Check for AI move
-        if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+        if user != player and not game_over and not provider.failed:
+            if not provider.pending:
+                provider.request(board)
             else:
-                ai_turn = True
+                move = provider.poll()
+                if move is not None:
+                    board = ttt.result(board, move)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,9 +146,12 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
+        # Offer a new game once this one is over, or while the computer
+        # is thinking, cancelling its search
+        if game_over or provider.failed or provider.pending:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
+            label = "Play Again" if game_over else "Restart"
+            again = mediumFont.render(label, True, black)
             againRect = again.get_rect()
             againRect.center = againButton.center
             pygame.draw.rect(screen, white, againButton)
@@ -141,6 +163,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    provider.cancel()
 
     pygame.display.flip()
+    clock.tick(fps)
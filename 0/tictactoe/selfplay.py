@@ -0,0 +1,209 @@
+"""
+Headless self-play harness for the Tic Tac Toe engines.
+
+Plays games between every ordered pair of the chosen engines (each
+plays X against each other as O), recording outcomes and, for every
+engine, per-move latency percentiles and the positions it searched.
+Engines keep their transposition tables between moves, as they would
+in runner.py, so the first moves carry the cost of warming them up.
+
+Usage: python selfplay.py [--engines NAME ...] [--games N] [--seed N]
+                          [--no-book] [--json FILE]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import bitboard
+import mcts
+import mnk
+import tictactoe as ttt
+import tictactoe_ab as ttt_ab
+
+
+def plain_engine(rng):
+    def move(board):
+        before = ttt.table.misses
+        action = ttt.minimax(board)
+        return action, ttt.table.misses - before
+    return move
+
+
+def ab_engine(rng):
+    def move(board):
+        action = ttt_ab.minimax(board)
+        return action, ttt_ab.stats.nodes
+    return move
+
+
+def bitboard_engine(rng):
+    def move(board):
+        before = bitboard.negamax.cache_info().misses
+        action = bitboard.board_minimax(board)
+        return action, bitboard.negamax.cache_info().misses - before
+    return move
+
+
+def mnk_engine(rng):
+    engine = mnk.Engine(mnk.Game(3, 3, 3))
+
+    def move(board):
+        action = engine.best_move(board)
+        return action, engine.nodes
+    return move
+
+
+def mcts_engine(rng):
+    engine = mcts.MCTS(seed=rng.randrange(2 ** 32))
+
+    def move(board):
+        action = engine.minimax(board)
+        return action, engine.searched
+    return move
+
+
+def random_engine(rng):
+    def move(board):
+        return rng.choice(sorted(ttt.actions(board))), 0
+    return move
+
+
+# Each entry makes a move function, board -> (action, positions searched)
+ENGINES = {
+    "tictactoe": plain_engine,
+    "tictactoe_ab": ab_engine,
+    "bitboard": bitboard_engine,
+    "mnk": mnk_engine,
+    "mcts": mcts_engine,
+    "random": random_engine,
+}
+
+
+def play(x_move, o_move):
+    """
+    Plays one game, returning the winner (or None for a tie) and the
+    (player, seconds, positions searched) of every move.
+    """
+    board = ttt.initial_state()
+    moves = []
+    while not ttt.terminal(board):
+        mover = ttt.player(board)
+        start = time.perf_counter()
+        action, nodes = (x_move if mover == ttt.X else o_move)(board)
+        elapsed = time.perf_counter() - start
+        if action not in ttt.actions(board):
+            raise ValueError(f"{mover} played invalid action {action}")
+        moves.append((mover, elapsed, nodes))
+        board = ttt.result(board, action)
+    return ttt.winner(board), moves
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of sorted values.
+    """
+    index = max(0, min(len(values) - 1, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+def summarize(latencies, nodes):
+    latencies = sorted(latencies)
+    return {
+        "moves": len(latencies),
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) * 1000,
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p90": percentile(latencies, 0.90) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "max": latencies[-1] * 1000,
+        },
+        "nodes": {
+            "total": sum(nodes),
+            "mean": sum(nodes) / len(nodes),
+            "max": max(nodes),
+        },
+    }
+
+
+def run(names, games, seed):
+    """
+    Returns the results of `games` games for every ordered pair of
+    engines, or of an engine against itself when only one is given.
+    """
+    rng = random.Random(seed)
+    players = {name: ENGINES[name](rng) for name in names}
+    pairs = [(x, o) for x in names for o in names if x != o] or [(names[0], names[0])]
+
+    matches = []
+    latencies = {name: [] for name in names}
+    nodes = {name: [] for name in names}
+    for x, o in pairs:
+        outcomes = {ttt.X: 0, ttt.O: 0, None: 0}
+        for _ in range(games):
+            winner, moves = play(players[x], players[o])
+            outcomes[winner] += 1
+            for mover, elapsed, searched in moves:
+                name = x if mover == ttt.X else o
+                latencies[name].append(elapsed)
+                nodes[name].append(searched)
+        matches.append({
+            "x": x,
+            "o": o,
+            "games": games,
+            "x_wins": outcomes[ttt.X],
+            "o_wins": outcomes[ttt.O],
+            "draws": outcomes[None],
+        })
+
+    return {
+        "games": games,
+        "seed": seed,
+        "matches": matches,
+        "engines": {name: summarize(latencies[name], nodes[name])
+                    for name in names if latencies[name]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES,
+                        default=["tictactoe", "tictactoe_ab", "random"])
+    parser.add_argument("--games", type=int, default=10,
+                        help="games per pair of engines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-book", action="store_true",
+                        help="make tictactoe search instead of reading its opening book")
+    parser.add_argument("--json", help="write results as JSON to a file, or - for stdout")
+    args = parser.parse_args()
+
+    if args.no_book:
+        ttt.opening_book = None
+    results = run(args.engines, args.games, args.seed)
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    for match in results["matches"]:
+        print(f"{match['x']:>12} (X) vs {match['o']:<12} (O)  "
+              f"X {match['x_wins']:>4}  O {match['o_wins']:>4}  "
+              f"draw {match['draws']:>4}")
+    print()
+    print(f"{'engine':>12} {'moves':>6} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9} {'nodes/move':>11}")
+    for name, summary in results["engines"].items():
+        latency = summary["latency_ms"]
+        print(f"{name:>12} {summary['moves']:>6} {latency['p50']:>9.3f} "
+              f"{latency['p90']:>9.3f} {latency['p99']:>9.3f} "
+              f"{latency['max']:>9.3f} {summary['nodes']['mean']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
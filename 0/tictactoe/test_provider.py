@@ -0,0 +1,93 @@
+"""
+Checks for provider.MoveProvider: cancelled searches never deliver
+their move, and a worker that dies is replaced or reported.
+
+Usage: python -m unittest test_provider
+"""
+
+import os
+import time
+import unittest
+
+from provider import MoveProvider
+
+
+def slow_search(board):
+    """Returns the board's first cell as a move, after a delay it names."""
+    time.sleep(board[1])
+    return board[0]
+
+
+def failing_search(board):
+    raise ValueError("search failed")
+
+
+def crashing_search(board):
+    os._exit(1)
+
+
+class MoveProviderTest(unittest.TestCase):
+
+    def wait(self, provider, timeout=10):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            move = provider.poll()
+            if move is not None or provider.failed:
+                return move
+            time.sleep(0.01)
+        self.fail("no move within the timeout")
+
+    def test_move(self):
+        provider = MoveProvider(slow_search)
+        self.addCleanup(provider.close)
+        provider.request(("fresh", 0))
+        self.assertEqual(self.wait(provider), "fresh")
+        self.assertFalse(provider.pending)
+
+    def test_cancel_mid_search(self):
+        provider = MoveProvider(slow_search)
+        self.addCleanup(provider.close)
+        provider.request(("stale", 0.5))
+        time.sleep(0.1)
+        provider.cancel()
+        self.assertFalse(provider.pending)
+        self.assertIsNone(provider.poll())
+        provider.request(("fresh", 0.7))
+        self.assertEqual(self.wait(provider), "fresh")
+
+    def test_request_mid_search(self):
+        provider = MoveProvider(slow_search)
+        self.addCleanup(provider.close)
+        provider.request(("stale", 0.2))
+        provider.request(("fresh", 0.4))
+        self.assertEqual(self.wait(provider), "fresh")
+
+    def test_search_fails(self):
+        provider = MoveProvider(failing_search)
+        self.addCleanup(provider.close)
+        provider.request(("any", 0))
+        self.assertIsNone(self.wait(provider))
+        self.assertTrue(provider.failed)
+        provider.cancel()
+        self.assertFalse(provider.failed)
+
+    def test_worker_crashes(self):
+        provider = MoveProvider(crashing_search)
+        self.addCleanup(provider.close)
+        provider.request(("any", 0))
+        self.assertIsNone(self.wait(provider))
+        self.assertTrue(provider.failed)
+
+    def test_worker_dies_idle(self):
+        provider = MoveProvider(slow_search)
+        self.addCleanup(provider.close)
+        provider.request(("first", 0))
+        self.assertEqual(self.wait(provider), "first")
+        provider.process.kill()
+        provider.process.join()
+        provider.request(("second", 0))
+        self.assertEqual(self.wait(provider), "second")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,10 +4,19 @@ Tic Tac Toe Player
 
 from copy import deepcopy
 
+import book
+from transposition import TranspositionTable
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Positions already solved by minimax, shared across calls
+table = TranspositionTable()
+
+# Best move for every reachable position, once `python book.py build` has run
+opening_book = book.load()
+
 
 def initial_state():
     """
@@ -59,31 +68,38 @@ def result(board, action):
     return new_board
 
 
-def winner(board):
-    """
-    Returns the winner of the game, if there is one.
-    """
+# Every line of three cells that wins the game
+LINES = (
+    # horizontal
+    ((0, 0), (0, 1), (0, 2)),
+    ((1, 0), (1, 1), (1, 2)),
+    ((2, 0), (2, 1), (2, 2)),
 
-    win_condition_ = (
-        # horizontal
-        ((0, 0), (0, 1), (0, 2)),
-        ((1, 0), (1, 1), (1, 2)),
-        ((2, 0), (2, 1), (2, 2)),
+    # diagonal
+    ((0, 0), (1, 1), (2, 2)),
+    ((2, 0), (1, 1), (0, 2)),
 
-        # diagonal
-        ((0, 0), (1, 1), (2, 2)),
-        ((2, 0), (1, 1), (0, 2)),
+    # vertical
+    ((0, 0), (1, 0), (2, 0)),
+    ((0, 1), (1, 1), (2, 1)),
+    ((0, 2), (1, 2), (2, 2)),
+)
 
-        # vertical
-        ((0, 0), (1, 0), (2, 0)),
-        ((0, 1), (1, 1), (2, 1)),
-        ((0, 2), (1, 2), (2, 2)),
+# The lines through each cell
+CELL_LINES = {
+    (i, j): tuple(line for line in LINES if (i, j) in line)
+    for i in range(3) for j in range(3)
+}
 
-    )
-    for wc in win_condition_:
-        candidate = tuple(board[i][j] for i, j in wc if board[i][j] != EMPTY)
-        if len(candidate) == 3 and len(set(candidate)) == 1:
-            return O if player(board) == X else X
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    for (i1, j1), (i2, j2), (i3, j3) in LINES:
+        mark = board[i1][j1]
+        if mark is not EMPTY and mark == board[i2][j2] == board[i3][j3]:
+            return mark
     return None
 
 
@@ -91,18 +107,10 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    # if there is a winner, return True
-    if winner(board) in (X, O):
+    if winner(board) is not None:
         return True
-
-    # if no winner and the board has empty cells, return False
-    for row in board:
-        for column in row:
-            if column == EMPTY:
-                return False
-
-    # full board with no winner, must be draw
-    return True
+    # no winner: the game is over once the board is full
+    return not any(EMPTY in row for row in board)
 
 
 def utility(board):
@@ -115,27 +123,90 @@ def utility(board):
     }.get(winner(board), 0)
 
 
-def max_value(board):
-    if terminal(board):
-        return utility(board), None
-    v, optimal_action = -100, None
-    for action in actions(board):
-        candidate_value, _ = min_value(result(board, action))
-        if candidate_value > v:
-            v = candidate_value
-            optimal_action = action
+class GameState():
+    """
+    A board with its winner, move count and empty cells, kept up to
+    date as moves are applied so the search never rescans the board:
+    player, terminal and utility take constant time.
+    """
+
+    def __init__(self, board):
+        self.board = [list(row) for row in board]
+        self.empties = frozenset(
+            (i, j) for i, row in enumerate(board)
+            for j, column in enumerate(row) if column == EMPTY
+        )
+        self.moves = 9 - len(self.empties)
+        self.winner = winner(board)
+
+    def player(self):
+        return X if self.moves % 2 == 0 else O
+
+    def actions(self):
+        return self.empties
+
+    def result(self, action):
+        """
+        Returns the state after the player to move plays action.
+        """
+        if action not in self.empties:
+            raise Exception(f'invalid action {action}')
+        i, j = action
+        mark = self.player()
+        state = GameState.__new__(GameState)
+        state.board = [list(row) for row in self.board]
+        state.board[i][j] = mark
+        state.empties = self.empties - {action}
+        state.moves = self.moves + 1
+        # Only lines through the new mark can have been completed
+        state.winner = self.winner
+        if state.winner is None:
+            for (i1, j1), (i2, j2), (i3, j3) in CELL_LINES[action]:
+                if state.board[i1][j1] == state.board[i2][j2] == state.board[i3][j3]:
+                    state.winner = mark
+                    break
+        return state
+
+    def terminal(self):
+        return self.winner is not None or not self.empties
+
+    def utility(self):
+        return 1 if self.winner == X else -1 if self.winner == O else 0
+
+
+def max_value(state):
+    entry, slot = table.lookup(state.board)
+    if entry is not None:
+        value, _, action = entry
+        return value, action
+    if state.terminal():
+        v, optimal_action = state.utility(), None
+    else:
+        v, optimal_action = -100, None
+        for action in state.actions():
+            candidate_value, _ = min_value(state.result(action))
+            if candidate_value > v:
+                v = candidate_value
+                optimal_action = action
+    table.store(slot, v, optimal_action)
     return v, optimal_action
 
 
-def min_value(board):
-    if terminal(board):
-        return utility(board), None
-    v, optimal_action = 100, None
-    for action in actions(board):
-        candidate_value, _ = max_value(result(board, action))
-        if candidate_value < v:
-            v = candidate_value
-            optimal_action = action
+def min_value(state):
+    entry, slot = table.lookup(state.board)
+    if entry is not None:
+        value, _, action = entry
+        return value, action
+    if state.terminal():
+        v, optimal_action = state.utility(), None
+    else:
+        v, optimal_action = 100, None
+        for action in state.actions():
+            candidate_value, _ = max_value(state.result(action))
+            if candidate_value < v:
+                v = candidate_value
+                optimal_action = action
+    table.store(slot, v, optimal_action)
     return v, optimal_action
 
 
@@ -146,8 +217,14 @@ def minimax(board):
     if terminal(board):
         return None
 
-    if player(board) == X:
-        v, action = max_value(board)
+    if opening_book is not None:
+        action = book.lookup(opening_book, board)
+        if action is not None:
+            return action
+
+    state = GameState(board)
+    if state.player() == X:
+        v, action = max_value(state)
     else:
-        v, action = min_value(board)
+        v, action = min_value(state)
     return action
@@ -3,12 +3,22 @@ Tic Tac Toe Player
 """
 
 import math
+import multiprocessing
 from copy import deepcopy
+from functools import lru_cache
+
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Positions already searched by minimax, shared across calls
+table = TranspositionTable()
+
+# Best root value found so far by parallel_minimax's pool workers
+shared_best = None
+
 
 def print_(board):
     print('\n'.join(
@@ -17,13 +27,11 @@ def print_(board):
     ))
 
 
-def initial_state():
+def initial_state(n=3):
     """
-    Returns starting state of the board.
+    Returns starting state of an n x n board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * n for _ in range(n)]
 
 
 def player(board):
@@ -63,30 +71,33 @@ def result(board, action):
     return new_board
 
 
-def winner(board):
+@lru_cache(maxsize=None)
+def win_conditions(n):
     """
-    Returns the winner of the game, if there is one.
+    Returns the lines of an n x n board that win when one player
+    holds all n cells.
     """
-
-    win_condition_ = (
+    return (
         # horizontal
-        ((0, 0), (0, 1), (0, 2)),
-        ((1, 0), (1, 1), (1, 2)),
-        ((2, 0), (2, 1), (2, 2)),
+        *(tuple((i, j) for j in range(n)) for i in range(n)),
 
         # diagonal
-        ((0, 0), (1, 1), (2, 2)),
-        ((2, 0), (1, 1), (0, 2)),
+        tuple((i, i) for i in range(n)),
+        tuple((n - 1 - i, i) for i in range(n)),
 
         # vertical
-        ((0, 0), (1, 0), (2, 0)),
-        ((0, 1), (1, 1), (2, 1)),
-        ((0, 2), (1, 2), (2, 2)),
-
+        *(tuple((i, j) for i in range(n)) for j in range(n)),
     )
-    for wc in win_condition_:
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    n = len(board)
+    for wc in win_conditions(n):
         candidate = tuple(board[i][j] for i, j in wc if board[i][j] != EMPTY)
-        if len(candidate) == 3 and len(set(candidate)) == 1:
+        if len(candidate) == n and len(set(candidate)) == 1:
             return O if player(board) == X else X
     return None
 
@@ -119,42 +130,155 @@ def utility(board):
     }.get(winner(board), 0)
 
 
-def max_value(board, a=-100, b=100):
+def probe(board, a, b):
+    """
+    Returns (value, action) from the transposition table when its
+    entry for the board settles the (a, b) window, else None, along
+    with the slot to store the search result in.
+    """
+    entry, slot = table.lookup(board)
+    if entry is not None:
+        value, kind, action = entry
+        if (kind == EXACT
+                or (kind == LOWER and value >= b)
+                or (kind == UPPER and value <= a)):
+            return (value, action), slot
+    return None, slot
+
+
+def record(slot, v, optimal_action, a, b):
+    """
+    Stores a search result, noting whether it is exact or a bound
+    from a cutoff of the (a, b) window.
+    """
+    if v <= a:
+        kind = UPPER
+    elif v >= b:
+        kind = LOWER
+    else:
+        kind = EXACT
+    table.store(slot, v, optimal_action, kind)
+
+
+class SearchStats():
+    """
+    Counts what one minimax call searched: positions visited, cutoffs,
+    and at each depth the positions expanded and the moves searched
+    from them.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.expanded = {}
+        self.children = {}
+
+    def expand(self, depth, children):
+        self.expanded[depth] = self.expanded.get(depth, 0) + 1
+        self.children[depth] = self.children.get(depth, 0) + children
+
+    def branching(self):
+        """
+        Returns {depth: average moves searched per expanded position}.
+        """
+        return {depth: self.children[depth] / self.expanded[depth]
+                for depth in sorted(self.expanded)}
+
+    def report(self):
+        return {
+            "nodes": self.nodes,
+            "cutoffs": self.cutoffs,
+            "branching": self.branching(),
+        }
+
+
+# Counters for the last minimax call
+stats = SearchStats()
+
+
+def ordered_actions(board):
+    """
+    Returns the actions available on the board, center cells first,
+    then corners, then the rest, since those hold the most lines and
+    cut the search off soonest.
+    """
+    last = len(board) - 1
+    middle = last / 2
+
+    def rank(action):
+        i, j = action
+        if abs(i - middle) < 1 and abs(j - middle) < 1:
+            return 0
+        if i in (0, last) and j in (0, last):
+            return 1
+        return 2
+
+    return sorted(actions(board), key=lambda action: (rank(action), action))
+
+
+def max_value(board, a=-math.inf, b=math.inf, depth=0):
+    stats.nodes += 1
+    cached, slot = probe(board, a, b)
+    if cached is not None:
+        return cached
     if terminal(board):
-        return utility(board), None
-    v = -100
+        v = utility(board)
+        table.store(slot, v, None)
+        return v, None
+    a_, b_ = a, b
+    v = -math.inf
     optimal_action = None
-    for n, action in enumerate(actions(board)):
-        candidate_value, _ = min_value(result(board, action), a=a, b=b)
+    searched = 0
+    for action in ordered_actions(board):
+        searched += 1
+        candidate_value, _ = min_value(result(board, action), a, b, depth + 1)
         if candidate_value > v:
             v = candidate_value
             optimal_action = action
-            a = v
+            a = max(a, v)
         if b <= a:
+            stats.cutoffs += 1
             break
+    stats.expand(depth, searched)
+    record(slot, v, optimal_action, a_, b_)
     return v, optimal_action
 
 
-def min_value(board, a=-100, b=100):
+def min_value(board, a=-math.inf, b=math.inf, depth=0):
+    stats.nodes += 1
+    cached, slot = probe(board, a, b)
+    if cached is not None:
+        return cached
     if terminal(board):
-        return utility(board), None
-    v = 100
+        v = utility(board)
+        table.store(slot, v, None)
+        return v, None
+    a_, b_ = a, b
+    v = math.inf
     optimal_action = None
-    for n, action in enumerate(actions(board)):
-        candidate_value, _ = max_value(result(board, action), a=a, b=b)
+    searched = 0
+    for action in ordered_actions(board):
+        searched += 1
+        candidate_value, _ = max_value(result(board, action), a, b, depth + 1)
         if candidate_value < v:
             v = candidate_value
             optimal_action = action
-            b = v
+            b = min(b, v)
         if b <= a:
+            stats.cutoffs += 1
             break
+    stats.expand(depth, searched)
+    record(slot, v, optimal_action, a_, b_)
     return v, optimal_action
 
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+    Counters for the search are left in `stats`.
     """
+    global stats
+    stats = SearchStats()
     if terminal(board):
         return None
 
@@ -165,6 +289,80 @@ def minimax(board):
     return action
 
 
+def init_worker(best):
+    global shared_best
+    shared_best = best
+
+
+def search_root_move(job):
+    """
+    Returns the value of the root move at an index, searched with a
+    window at the best root value other workers have found. Moves after
+    the best one only need to beat it, while moves before it only need
+    to tie, so every move that could be chosen gets its exact value
+    and the rest fail low.
+    """
+    board, action, index = job
+    child = result(board, action)
+    with shared_best.get_lock():
+        value, best_index = shared_best
+    if player(board) == X:
+        v, _ = min_value(child, a=value if best_index < index else value - 1, depth=1)
+        with shared_best.get_lock():
+            value, best_index = shared_best
+            if v > value or (v == value and index < best_index):
+                shared_best[:] = [v, index]
+    else:
+        v, _ = max_value(child, b=value if best_index < index else value + 1, depth=1)
+        with shared_best.get_lock():
+            value, best_index = shared_best
+            if v < value or (v == value and index < best_index):
+                shared_best[:] = [v, index]
+    return v
+
+
+def parallel_minimax(board, processes=None):
+    """
+    Returns the optimal action for the current player on the board,
+    the same one minimax returns. The first root move is searched here,
+    then the rest in a pool of processes that share the best root value
+    found so far and inherit the transposition table filled by the
+    first search. Counters for the search done here are left in
+    `stats`.
+    """
+    global stats
+    stats = SearchStats()
+    if terminal(board):
+        return None
+
+    # Answer from the table when it already holds the root, as minimax does
+    stats.nodes += 1
+    cached, slot = probe(board, -math.inf, math.inf)
+    if cached is not None:
+        return cached[1]
+
+    moves = ordered_actions(board)
+    if player(board) == X:
+        v, _ = min_value(result(board, moves[0]), depth=1)
+    else:
+        v, _ = max_value(result(board, moves[0]), depth=1)
+    if len(moves) == 1:
+        record(slot, v, moves[0], -math.inf, math.inf)
+        return moves[0]
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    best = context.Array("i", [v, 0])
+    processes = min(processes or multiprocessing.cpu_count(), len(moves) - 1)
+    with context.Pool(processes, initializer=init_worker, initargs=(best,)) as pool:
+        pool.map(search_root_move,
+                 [(board, action, index)
+                  for index, action in enumerate(moves) if index > 0],
+                 chunksize=1)
+    record(slot, best[0], moves[best[1]], -math.inf, math.inf)
+    return moves[best[1]]
+
+
 if __name__ == '__main__':
     board = [
         [X, O, None],
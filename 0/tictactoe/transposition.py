@@ -0,0 +1,116 @@
+"""
+Transposition table for tic-tac-toe search.
+
+Positions are keyed on a canonical form of the board: the smallest of
+its 8 images under the rotations and reflections of the grid, so every
+symmetric variant of a position shares one entry. Best moves are stored
+in the canonical frame and mapped back onto the board they are looked
+up for.
+"""
+
+from functools import lru_cache
+
+# Kinds of stored value: exact, or a bound from an alpha-beta cutoff
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+
+@lru_cache(maxsize=None)
+def symmetries(n):
+    """
+    Returns the 8 symmetries of an n x n board as permutations p of
+    cell indices (i * n + j): the transformed board has board cell
+    p[k] at cell k.
+    """
+    last = n - 1
+    transforms = (
+        lambda i, j: (i, j),
+        lambda i, j: (j, last - i),
+        lambda i, j: (last - i, last - j),
+        lambda i, j: (last - j, i),
+        lambda i, j: (i, last - j),
+        lambda i, j: (last - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (last - j, last - i),
+    )
+    permutations = []
+    for transform in transforms:
+        permutation = [0] * (n * n)
+        for i in range(n):
+            for j in range(n):
+                ti, tj = transform(i, j)
+                permutation[ti * n + tj] = i * n + j
+        permutations.append(tuple(permutation))
+    return tuple(permutations)
+
+
+def canonical(board):
+    """
+    Returns (key, permutation) for a board, where key is the smallest
+    symmetric image of the board and permutation produced it.
+    """
+    codes = {None: 0, "X": 1, "O": 2}
+    cells = [codes[cell] for row in board for cell in row]
+    best = None
+    for permutation in symmetries(len(board)):
+        image = tuple(cells[k] for k in permutation)
+        if best is None or image < best[0]:
+            best = (image, permutation)
+    return best
+
+
+class TranspositionTable():
+    """
+    Maps canonical positions to (value, kind, best move), counting
+    lookups that hit and miss.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, board):
+        """
+        Returns (entry, slot) for a board. entry is (value, kind, action)
+        with action mapped onto the board, or None on a miss; slot is
+        passed back to store.
+        """
+        key, permutation = canonical(board)
+        slot = (key, permutation, len(board))
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, slot
+        self.hits += 1
+        value, kind, cell = entry
+        action = None
+        if cell is not None:
+            cell = permutation[cell]
+            action = divmod(cell, len(board))
+        return (value, kind, action), slot
+
+    def store(self, slot, value, action, kind=EXACT):
+        """
+        Stores a searched position's value and best move.
+        """
+        key, permutation, n = slot
+        cell = None
+        if action is not None:
+            cell = permutation.index(action[0] * n + action[1])
+        self.entries[key] = (value, kind, cell)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,89 @@
+"""
+Measure building and walking a large knowledge base: a ring of N
+islanders, each saying whether their neighbours are the same kind, in
+the style of puzzle.py, so the same subformulas appear many times.
+
+Reports construction time and memory (from tracemalloc), how many
+distinct sentence objects the tree holds against its size as a tree,
+and the time taken by repeated symbols() and hash() calls.
+
+Usage: python bench_logic.py [--people N] [--repeat N]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+def build(people):
+    knowledge = And()
+    for i in range(people):
+        knight = Symbol(f"{i} is a Knight")
+        knave = Symbol(f"{i} is a Knave")
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+        for j in ((i + 1) % people, (i + 2) % people):
+            same = Or(
+                And(knight, Symbol(f"{j} is a Knight")),
+                And(knave, Symbol(f"{j} is a Knave")),
+            )
+            knowledge.add(Implication(knight, same))
+            knowledge.add(Implication(knave, Not(same)))
+            knowledge.add(Biconditional(same, Or(
+                And(Symbol(f"{j} is a Knight"), knight),
+                And(Symbol(f"{j} is a Knave"), knave),
+            )))
+    return knowledge
+
+
+def count(sentence):
+    """
+    Returns (nodes as a tree, distinct objects).
+    """
+    nodes = 0
+    distinct = set()
+    stack = [sentence]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        distinct.add(id(node))
+        stack.extend(node.children())
+    return nodes, len(distinct)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--people", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    knowledge = build(args.people)
+    built = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes, distinct = count(knowledge)
+    print(f"{args.people} people, {len(knowledge.conjuncts)} conjuncts")
+    print(f"build     {built * 1000:>10.1f}ms {memory / 2 ** 20:>8.2f} MiB")
+    print(f"nodes     {nodes:>10} as a tree, {distinct} distinct objects")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        symbols = knowledge.symbols()
+    elapsed = (time.perf_counter() - start) / args.repeat
+    print(f"symbols() {elapsed * 1000:>10.3f}ms ({len(symbols)} symbols)")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for conjunct in knowledge.conjuncts:
+            hash(conjunct)
+    elapsed = (time.perf_counter() - start) / args.repeat
+    print(f"hash()    {elapsed * 1000:>10.3f}ms (every conjunct)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare serial and multiprocess model_check on the truth-table
+backends over a growing number of symbols.
+
+The knowledge base is a chain p0, p0 => p1, ..., so "entailed" asks
+for the last symbol, which holds in every model and needs the whole
+model space checked, and "refuted" asks for its negation, where the
+first counter-model found stops every worker.
+
+Usage: python bench_parallel.py [--backend enumerate|bitset]
+                                [--symbols N ...] [--processes N ...]
+"""
+
+import argparse
+import os
+import time
+
+from logic import And, Implication, Not, Symbol, model_check
+
+
+def chain(count):
+    symbols = [Symbol(f"p{i}") for i in range(count)]
+    knowledge = And(symbols[0], *[
+        Implication(symbols[i], symbols[i + 1]) for i in range(count - 1)
+    ])
+    return knowledge, symbols[-1]
+
+
+def timed(knowledge, query, backend, processes):
+    start = time.perf_counter()
+    entailed = model_check(knowledge, query, backend=backend, processes=processes)
+    return entailed, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=("enumerate", "bitset"),
+                        default="enumerate")
+    parser.add_argument("--symbols", type=int, nargs="+",
+                        default=[10, 12, 14, 16])
+    cores = os.cpu_count()
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({2, 4, cores}))
+    args = parser.parse_args()
+
+    print(f"{cores} cores, {args.backend} backend")
+    for count in args.symbols:
+        knowledge, last = chain(count)
+        for name, query in (("entailed", last), ("refuted", Not(last))):
+            expected, serial = timed(knowledge, query, args.backend, 1)
+            print(f"{count:>3} symbols {name:>8}  serial {serial:>8.3f}s", end="")
+            for processes in args.processes:
+                entailed, elapsed = timed(knowledge, query, args.backend, processes)
+                if entailed != expected:
+                    raise SystemExit(f"{processes} processes disagree on {name}")
+                print(f"  {processes}p {elapsed:>7.3f}s ({serial / elapsed:.2f}x)", end="")
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,111 @@
 import itertools
-
-
-class Sentence():
+import multiprocessing
+import weakref
+
+# Symbols whose truth values are packed into the bits of one bitset;
+# further symbols are enumerated one assignment at a time
+BLOCK_SYMBOLS = 20
+
+# Prefix assignments handed out per worker process, for load balancing
+TASKS_PER_PROCESS = 4
+
+# (knowledge, query, backend) checked by pool workers
+worker_check = None
+
+
+class Interned(type):
+    """
+    Metaclass that hash-conses sentences: building a sentence equal to
+    one that already exists returns the existing object, so identical
+    subformulas share one node. Every sentence it shares is frozen,
+    along with everything below it. And is the one mutable sentence
+    (And.add() changes it in place), so classes that set
+    `interned = None` are never shared, and an And is frozen once it
+    is used as an operand of a shared sentence.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        if "interned" not in namespace:
+            cls.interned = weakref.WeakValueDictionary()
+
+    def __call__(cls, *args, **kwargs):
+        if cls.interned is None or kwargs:
+            return super().__call__(*args, **kwargs)
+        for arg in args:
+            if isinstance(arg, Sentence):
+                arg.freeze()
+        try:
+            sentence = cls.interned.get(args)
+        except TypeError:
+            # Unhashable arguments, which __init__ rejects
+            return super().__call__(*args)
+        if sentence is None:
+            sentence = super().__call__(*args)
+            sentence._frozen = True
+            cls.interned[args] = sentence
+        return sentence
+
+
+class Sentence(metaclass=Interned):
+    __slots__ = ("_hash", "_symbols", "_frozen", "__weakref__")
+
+    def __init__(self):
+        # Computed on first use, and kept only by frozen sentences
+        self._hash = None
+        self._symbols = None
+        self._frozen = False
+
+    def freeze(self):
+        """Makes the sentence and everything below it immutable."""
+        if not self._frozen:
+            for child in self.children():
+                child.freeze()
+            self._frozen = True
+
+    def cache(self, name, value):
+        """Keeps a computed value if the sentence can never change."""
+        if self._frozen:
+            setattr(self, name, value)
+        return value
+
+    def __reduce__(self):
+        # Unpickle through the constructor, so loaded sentences are interned
+        return (type(self), tuple(self.children()))
+
+    def children(self):
+        """Returns the sentences this sentence is built from."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def compile(self):
+        """
+        Returns a function of (columns, full) that evaluates the
+        sentence in many models at once: columns maps each symbol name
+        to a bitset of the models where it is true, full has a bit set
+        for every model, and the result is the bitset of models where
+        the sentence is true.
+        """
+        raise Exception("nothing to compile")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """Returns the symbols as a frozenset."""
+        if self._symbols is None:
+            return self.cache("_symbols", frozenset().union(
+                *[child.symbol_set() for child in self.children()]
+            ))
+        return self._symbols
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +135,25 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
+        super().__init__()
         self.name = name
+        self._symbols = frozenset((name,))
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        if self._hash is None:
+            return self.cache("_hash", hash(("symbol", self.name)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -62,23 +164,40 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def compile(self):
+        name = self.name
+
+        def evaluate(columns, full):
+            try:
+                return columns[name]
+            except KeyError:
+                raise Exception(f"variable {name} not in model")
+        return evaluate
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
+        super().__init__()
         Sentence.validate(operand)
         self.operand = operand
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        if self._hash is None:
+            return self.cache("_hash", hash(("not", hash(self.operand))))
+        return self._hash
+
+    def children(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +205,40 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def compile(self):
+        operand = self.operand.compile()
+        return lambda columns, full: full ^ operand(columns, full)
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+    # add() changes a conjunction in place, so each one is its own object,
+    # frozen once it is used as an operand of a shared sentence
+    interned = None
+
     def __init__(self, *conjuncts):
+        super().__init__()
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            return self.cache("_hash", hash(
+                ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+            ))
+        return self._hash
+
+    def children(self):
+        return self.conjuncts
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +247,56 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self._frozen:
+            raise TypeError("cannot add to a conjunction used in another sentence")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def compile(self):
+        conjuncts = [conjunct.compile() for conjunct in self.conjuncts]
+
+        def evaluate(columns, full):
+            models = full
+            for conjunct in conjuncts:
+                models &= conjunct(columns, full)
+                if not models:
+                    break
+            return models
+        return evaluate
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
+        super().__init__()
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        if self._hash is None:
+            return self.cache("_hash", hash(
+                ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+            ))
+        return self._hash
+
+    def children(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +305,49 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def compile(self):
+        disjuncts = [disjunct.compile() for disjunct in self.disjuncts]
+
+        def evaluate(columns, full):
+            models = 0
+            for disjunct in disjuncts:
+                models |= disjunct(columns, full)
+                if models == full:
+                    break
+            return models
+        return evaluate
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
+        super().__init__()
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (isinstance(other, Implication)
+                                 and self.antecedent == other.antecedent
+                                 and self.consequent == other.consequent)
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        if self._hash is None:
+            return self.cache("_hash", hash(
+                ("implies", hash(self.antecedent), hash(self.consequent))
+            ))
+        return self._hash
+
+    def children(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +356,43 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def compile(self):
+        antecedent = self.antecedent.compile()
+        consequent = self.consequent.compile()
+        return lambda columns, full: (
+            (full ^ antecedent(columns, full)) | consequent(columns, full)
+        )
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
+        super().__init__()
         Sentence.validate(left)
         Sentence.validate(right)
         self.left = left
         self.right = right
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (isinstance(other, Biconditional)
+                                 and self.left == other.left
+                                 and self.right == other.right)
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        if self._hash is None:
+            return self.cache("_hash", hash(
+                ("biconditional", hash(self.left), hash(self.right))
+            ))
+        return self._hash
+
+    def children(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,17 +403,67 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def compile(self):
+        left = self.left.compile()
+        right = self.right.compile()
+        return lambda columns, full: (
+            full ^ (left(columns, full) ^ right(columns, full))
+        )
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def symbol_column(index, count):
+    """
+    Returns the bitset of the 2 ** count models in which symbol number
+    index is true: model m assigns symbol k the value of bit k of m.
+    """
+    period = 2 << index
+    column = ((1 << (1 << index)) - 1) << (1 << index)
+    while period < 1 << count:
+        column |= column << period
+        period <<= 1
+    return column
+
+
+def bitset_check(knowledge, query, fixed=None):
+    """
+    Checks if knowledge base entails query by evaluating both compiled
+    sentences over blocks of up to 2 ** BLOCK_SYMBOLS models at a time,
+    in the models that agree with the fixed {symbol: value} assignment.
+    """
+    fixed = fixed or {}
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()) - fixed.keys())
+    knowledge = knowledge.compile()
+    query = query.compile()
+
+    packed, enumerated = symbols[:BLOCK_SYMBOLS], symbols[BLOCK_SYMBOLS:]
+    full = (1 << (1 << len(packed))) - 1
+    columns = {
+        symbol: symbol_column(index, len(packed))
+        for index, symbol in enumerate(packed)
+    }
+    for symbol, value in fixed.items():
+        columns[symbol] = full if value else 0
+    for assignment in range(1 << len(enumerated)):
+        for index, symbol in enumerate(enumerated):
+            columns[symbol] = full if assignment >> index & 1 else 0
+
+        # Entailment fails in any model of knowledge where query is false
+        models = knowledge(columns, full)
+        if models and models & ~query(columns, full):
+            return False
+    return True
+
+
+def enumerate_check(knowledge, query, model=None):
+    """
+    Checks if knowledge base entails query by enumerating models one at
+    a time, starting from a model that may already assign some symbols.
+    """
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -256,8 +493,152 @@ def model_check(knowledge, query):
             return (check_all(knowledge, query, remaining, model_true) and
                     check_all(knowledge, query, remaining, model_false))
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    # Get all symbols in both knowledge and query not yet in the model
+    model = dict(model or {})
+    symbols = set.union(knowledge.symbols(), query.symbols()) - model.keys()
 
     # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    return check_all(knowledge, query, symbols, model)
+
+
+def init_worker(knowledge, query, backend):
+    global worker_check
+    worker_check = (knowledge, query, backend)
+
+
+def check_prefix(prefix):
+    """
+    Checks entailment in the models that extend a prefix assignment.
+    """
+    knowledge, query, backend = worker_check
+    if backend == "bitset":
+        return bitset_check(knowledge, query, dict(prefix))
+    return enumerate_check(knowledge, query, dict(prefix))
+
+
+def parallel_check(knowledge, query, backend, processes=None):
+    """
+    Checks if knowledge base entails query in a pool of processes, each
+    checking the models under one assignment of the first few symbols.
+    As soon as one finds a model of knowledge where query is false, the
+    pool is terminated and the rest of the search abandoned.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    count = min(len(symbols), (processes * TASKS_PER_PROCESS - 1).bit_length())
+    # Hand out prefixes in the order the serial search visits them,
+    # true before false
+    prefixes = [
+        tuple((symbol, not assignment >> index & 1)
+              for index, symbol in enumerate(symbols[:count]))
+        for assignment in range(1 << count)
+    ]
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(processes, initializer=init_worker,
+                      initargs=(knowledge, query, backend)) as pool:
+        for entailed in pool.imap_unordered(check_prefix, prefixes):
+            if not entailed:
+                # Leaving the block terminates workers still searching
+                return False
+    return True
+
+
+def model_check(knowledge, query, backend="bitset", processes=1):
+    """
+    Checks if knowledge base entails query, with the "bitset" backend
+    (compiled sentences over packed models), by enumerating models one
+    at a time ("enumerate"), or with the CDCL solver in sat.py ("sat"),
+    which does not enumerate models and scales to many more symbols.
+
+    The truth-table backends split the models across `processes` worker
+    processes when it is not 1 (None for one per CPU).
+    """
+    if backend not in ("bitset", "enumerate", "sat"):
+        raise ValueError(f"unknown model_check backend {backend}")
+    if backend == "sat":
+        if processes != 1:
+            raise ValueError("the sat backend runs in one process")
+        # sat builds on the classes here, so only import it when used
+        import sat
+        return sat.entails(knowledge, query)
+    if processes != 1:
+        return parallel_check(knowledge, query, backend, processes)
+    if backend == "bitset":
+        return bitset_check(knowledge, query)
+    return enumerate_check(knowledge, query)
+
+
+class KnowledgeBase():
+    """
+    Sentences told so far, with the bitset of models that satisfy all
+    of them. Any number of queries are answered against those models,
+    and telling a new sentence filters them rather than starting over.
+
+    The bitset has a bit per model, so it is kept for at most
+    BLOCK_SYMBOLS symbols. Past that, the models are dropped and
+    queries go to the sat backend of model_check instead.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        # Bitset of the models where each symbol is true
+        self.columns = {}
+        # With no symbols there is a single, empty model; None once
+        # there are too many symbols to keep them
+        self.full = 1
+        self.models = 1
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def universe(self, symbols):
+        """
+        Returns (columns, full, models) extended with any new symbols,
+        or None if that would take more than BLOCK_SYMBOLS symbols.
+        Each new symbol doubles the models: the existing ones with the
+        symbol false, and copies of them with it true.
+        """
+        if self.models is None:
+            return None
+        new = sorted(set(symbols) - self.columns.keys())
+        if len(self.columns) + len(new) > BLOCK_SYMBOLS:
+            return None
+        columns = dict(self.columns)
+        full = self.full
+        models = self.models
+        for symbol in new:
+            width = full.bit_length()
+            for name in columns:
+                columns[name] |= columns[name] << width
+            columns[symbol] = full << width
+            models |= models << width
+            full |= full << width
+        return columns, full, models
+
+    def tell(self, sentence):
+        """Adds a sentence known to be true."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        universe = self.universe(sentence.symbols())
+        if universe is None:
+            self.columns, self.full, self.models = {}, None, None
+            return
+        self.columns, self.full, models = universe
+        self.models = models & sentence.compile()(self.columns, self.full)
+
+    def ask(self, query):
+        """Checks if the knowledge base entails query."""
+        Sentence.validate(query)
+        universe = self.universe(query.symbols())
+        if universe is None:
+            return model_check(And(*self.sentences), query, backend="sat")
+        columns, full, models = universe
+        return not models & (full ^ query.compile()(columns, full))
+
+    def satisfiable(self):
+        """Checks if any model makes every sentence told true."""
+        if self.models is None:
+            import sat
+            return sat.satisfiable(*self.sentences)
+        return self.models != 0
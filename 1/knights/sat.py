@@ -0,0 +1,346 @@
+"""
+SAT-based entailment for logic.py.
+
+Knowledge entails a query exactly when knowledge ∧ ¬query has no model.
+The sentences are turned into clauses by Tseitin encoding (one fresh
+variable per connective, so the CNF grows linearly rather than
+exponentially), and the clauses go to a conflict-driven clause
+learning (CDCL) solver: unit propagation over two watched literals per
+clause, first-UIP conflict analysis with non-chronological
+backjumping, activity-ordered decisions and restarts.
+
+Literals are nonzero ints: variable v is v when true and -v when false.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class Encoder():
+    """
+    Builds a CNF for sentences, assigning a variable to each symbol and
+    connective.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+        self.literals = {}
+        # Variable forced true, for empty conjunctions and disjunctions
+        self.true = self.fresh()
+        self.clauses.append([self.true])
+
+    def fresh(self):
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = self.fresh()
+        return self.variables[name]
+
+    def require(self, sentence):
+        """
+        Adds clauses that hold exactly when the sentence is true,
+        without fresh variables for top-level conjunctions and
+        disjunctions.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.require(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.encode(disjunct) for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.encode(sentence.antecedent),
+                                 self.encode(sentence.consequent)])
+        else:
+            self.clauses.append([self.encode(sentence)])
+
+    def encode(self, sentence):
+        """
+        Returns a literal that is true exactly when the sentence is.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.encode(sentence.operand)
+
+        key = id(sentence)
+        if key in self.literals:
+            return self.literals[key][0]
+        clauses = self.clauses
+
+        if isinstance(sentence, And):
+            operands = [self.encode(conjunct) for conjunct in sentence.conjuncts]
+            if not operands:
+                return self.true
+            literal = self.fresh()
+            for operand in operands:
+                clauses.append([-literal, operand])
+            clauses.append([literal] + [-operand for operand in operands])
+        elif isinstance(sentence, (Or, Implication)):
+            if isinstance(sentence, Or):
+                operands = [self.encode(disjunct) for disjunct in sentence.disjuncts]
+            else:
+                operands = [-self.encode(sentence.antecedent),
+                            self.encode(sentence.consequent)]
+            if not operands:
+                return -self.true
+            literal = self.fresh()
+            clauses.append([-literal] + operands)
+            for operand in operands:
+                clauses.append([literal, -operand])
+        elif isinstance(sentence, Biconditional):
+            left = self.encode(sentence.left)
+            right = self.encode(sentence.right)
+            literal = self.fresh()
+            clauses.append([-literal, -left, right])
+            clauses.append([-literal, left, -right])
+            clauses.append([literal, left, right])
+            clauses.append([literal, -left, -right])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        # Keep the sentence alive so its id is not reused
+        self.literals[key] = (literal, sentence)
+        return literal
+
+
+class Solver():
+    """
+    CDCL satisfiability solver over clauses of int literals.
+    """
+
+    def __init__(self, count, clauses):
+        self.count = count
+        # Per variable: 1 true, -1 false, 0 unassigned
+        self.values = [0] * (count + 1)
+        self.levels = [0] * (count + 1)
+        self.reasons = [None] * (count + 1)
+        self.phases = [-1] * (count + 1)
+        self.activity = [0.0] * (count + 1)
+        self.bump = 1.0
+        self.heap = [(0.0, variable) for variable in range(1, count + 1)]
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.clauses = []
+        self.watches = {}
+        self.conflicts = 0
+        self.unsatisfiable = False
+        for clause in clauses:
+            self.add(list(dict.fromkeys(clause)))
+
+    def value(self, literal):
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def add(self, clause):
+        """
+        Adds a clause at decision level 0.
+        """
+        if any(-literal in clause for literal in clause):
+            return
+        clause = [literal for literal in clause if self.value(literal) != -1]
+        if any(self.value(literal) == 1 for literal in clause):
+            return
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(index)
+        self.watches.setdefault(clause[1], []).append(index)
+        return index
+
+    def propagate(self):
+        """
+        Assigns literals forced by unit clauses, returning the index of
+        a clause left with every literal false, or None.
+        """
+        values = self.values
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false, [])
+            kept = []
+            conflict = None
+            for position, index in enumerate(watching):
+                clause = self.clauses[index]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                value = values[abs(first)]
+                if (value if first > 0 else -value) == 1:
+                    kept.append(index)
+                    continue
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    value = values[abs(literal)]
+                    if (value if literal > 0 else -value) != -1:
+                        clause[1], clause[k] = literal, false
+                        self.watches.setdefault(literal, []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    value = values[abs(first)]
+                    if (value if first > 0 else -value) == -1:
+                        conflict = index
+                        kept.extend(watching[position + 1:])
+                        break
+                    self.assign(first, index)
+            self.watches[false] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (learned clause, backjump level) for a conflict, the
+        clause asserting the negation of the first unique implication
+        point.
+        """
+        level = len(self.limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        reason = self.clauses[conflict]
+        index = len(self.trail) - 1
+        while True:
+            for other in reason:
+                if other == literal:
+                    continue
+                variable = abs(other)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.raise_activity(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+            # Walk back to the latest literal of this level in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            reason = self.clauses[self.reasons[abs(literal)]]
+        learned[0] = -literal
+
+        backjump = 0
+        if len(learned) > 1:
+            # Watch the literal of the highest remaining level second
+            best = max(range(1, len(learned)),
+                       key=lambda k: self.levels[abs(learned[k])])
+            learned[1], learned[best] = learned[best], learned[1]
+            backjump = self.levels[abs(learned[1])]
+        return learned, backjump
+
+    def raise_activity(self, variable):
+        self.activity[variable] += self.bump
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.bump *= 1e-100
+            self.heap = [(-self.activity[v], v) for v in range(1, self.count + 1)]
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = 0
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = start
+
+    def decide(self):
+        """
+        Returns the unassigned variable of highest activity, or None.
+        """
+        while self.heap:
+            activity, variable = heapq.heappop(self.heap)
+            if self.values[variable] == 0 and -activity == self.activity[variable]:
+                return variable
+        for variable in range(1, self.count + 1):
+            if self.values[variable] == 0:
+                return variable
+        return None
+
+    def solve(self):
+        """
+        Returns True if the clauses have a satisfying assignment.
+        """
+        if self.unsatisfiable:
+            return False
+        restart = 100
+        since_restart = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                since_restart += 1
+                if not self.limits:
+                    return False
+                learned, backjump = self.analyze(conflict)
+                self.backtrack(backjump)
+                self.bump /= 0.95
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                continue
+
+            if since_restart >= restart:
+                since_restart = 0
+                restart = int(restart * 1.5)
+                self.backtrack(0)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                return True
+            self.limits.append(len(self.trail))
+            self.assign(variable * self.phases[variable], None)
+
+
+def satisfiable(*sentences):
+    """
+    Returns True if some model makes every sentence true.
+    """
+    encoder = Encoder()
+    for sentence in sentences:
+        encoder.require(sentence)
+    return Solver(encoder.count, encoder.clauses).solve()
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query: knowledge ∧ ¬query has no
+    model.
+    """
+    return not satisfiable(knowledge, Not(query))